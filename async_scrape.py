@@ -0,0 +1,282 @@
+"""
+asyncio version of the scraper in scrape.py
+
+Fetches the pages of every website in sources.SOURCES concurrently with a
+single aiohttp client session so the data can be re-scraped from inside an
+event loop without tying up a thread for minutes.
+
+Example:
+    asyncio.run(async_get_data())
+
+Notes:
+    -the number of pages downloaded at the same time is bounded by a
+    semaphore (concurrency) so the websites don't get flooded
+
+    -parsing the html and reading the plant data from it is done in a
+    worker thread so the event loop stays responsive while BeautifulSoup
+    is busy
+
+    -an error page (status isn't 200) stops the scrape with
+    aiohttp.ClientError instead of being read as a plant
+
+    -each Source finds its plant care pages (Source.discover()) in a worker
+    thread, the listing pages it asks for are downloaded on the event loop
+
+    -cancelling async_get_data() cancels every page that is still being
+    downloaded and no new page is requested, nothing is saved
+"""
+
+import asyncio # concurrent downloads
+import threading # stops Source.discover() threads
+import aiohttp # async http client
+from bs4 import BeautifulSoup as bs # extract data from html
+import validate # data quality checks before saving
+from merge import remove_repeats # combines plants with the same name
+from sources import SOURCES, URLFrontier, merge_results # the websites
+from scrape import save_file # also registers tropicopia and houseplant411
+
+
+def parse_html(content, parse=None):
+    """
+    Parameters:
+        content : bytes
+            html of a webpage
+        parse : callable or None
+            called with the BeautifulSoup object
+
+    Returns:
+        BeautifulSoup object, or what parse returns
+    """
+    soup = bs(content, "html.parser")
+    return soup if parse is None else parse(soup)
+
+
+async def async_scrape_html(session, url, timeout=None, parse=None):
+    """
+    Returns the html content for a webpage
+
+    Parameters:
+        session : aiohttp.ClientSession
+            client used for the request
+        url : str
+            webpage url as a string
+        timeout : int/float or None
+            seconds before the request is given up on,
+            None uses the session's timeout
+        parse : callable or None
+            called with the BeautifulSoup object in the same worker thread
+            the html is parsed in, its result is returned instead
+
+    Returns:
+        BeautifulSoup object : representation of the parsed html
+
+    Raises:
+        asyncio.TimeoutError: the page took longer than timeout
+        aiohttp.ClientError: the page is an error page (status isn't 200)
+    """
+    kwargs = {}
+    if timeout is not None:
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+    async with session.get(url, **kwargs) as page:
+        if page.status != 200:
+            raise aiohttp.ClientError(f"Could not read {url}: "
+                                      f"status {page.status}")
+        content = await page.read()
+    return await asyncio.to_thread(parse_html, content, parse)
+
+
+async def scrape_pages(session, urls, parse, semaphore,
+                       timeout=None, progress=None, source=""):
+    """
+    Downloads and parses a list of webpages concurrently
+
+    Parameters:
+        session : aiohttp.ClientSession
+            client used for the requests
+        urls : list
+            webpage urls
+        parse : callable
+            turns a BeautifulSoup object into a plant dictionary,
+            called in a worker thread
+        semaphore : asyncio.Semaphore
+            limits how many pages are downloaded at the same time
+        timeout : int/float or None
+            seconds before a single page is given up on
+        progress : callable or None
+            called as progress(source, done, total) after each page
+        source : str
+            name of the website, passed to progress
+
+    Returns:
+        list : plant dictionaries in the same order as urls
+    """
+    total = len(urls)
+    done = 0
+
+    async def scrape_page(url):
+        nonlocal done
+        async with semaphore:
+            plant = await async_scrape_html(session, url, timeout, parse)
+        done += 1
+        if progress is not None:
+            progress(source, done, total)
+        return plant
+
+    tasks = [asyncio.ensure_future(scrape_page(url)) for url in urls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # one page failed or we were cancelled, stop downloading the rest
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def async_scrape_listing(session, url, timeout=None):
+    """
+    async version of sources.scrape_listing()
+
+    Returns:
+        BeautifulSoup object or None : representation of the parsed html,
+        None for network errors and error pages
+    """
+    kwargs = {}
+    if timeout is not None:
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with session.get(url, **kwargs) as page:
+            if page.status != 200:
+                print(f"Could not read {url}: status {page.status}")
+                return None
+            content = await page.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        print(f"Could not read {url}: {error!r}")
+        return None
+    return await asyncio.to_thread(parse_html, content)
+
+
+async def async_discover(source, session, frontier, semaphore, timeout=None):
+    """
+    Runs source.discover() in a worker thread, the listing pages it reads
+    are downloaded with session on the event loop
+
+    The thread can't be cancelled, so once this is cancelled (or fails)
+    the download it is waiting for is cancelled and any later fetch()
+    raises asyncio.CancelledError instead of downloading another page
+
+    Returns:
+        list : urls of the source's plant care pages
+    """
+    loop = asyncio.get_running_loop()
+    stopped = threading.Event()
+    downloads = set()
+
+    async def fetch_listing(url):
+        # runs on the loop, so it can't start after stopped is set there
+        if stopped.is_set():
+            raise asyncio.CancelledError()
+        async with semaphore:
+            return await async_scrape_listing(session, url, timeout)
+
+    def fetch(url):
+        # called in the worker thread, waits for the download on the loop
+        if stopped.is_set():
+            raise asyncio.CancelledError()
+        download = asyncio.run_coroutine_threadsafe(fetch_listing(url), loop)
+        downloads.add(download)
+        try:
+            return download.result()
+        finally:
+            downloads.discard(download)
+
+    try:
+        return await asyncio.to_thread(source.discover, frontier, fetch)
+    except BaseException:
+        stopped.set()
+        for download in list(downloads):
+            download.cancel()
+        raise
+
+
+async def async_scrape_source(source, session, frontier, semaphore,
+                              timeout=None, progress=None):
+    """ async version of sources.Source.scrape() """
+    urls = await async_discover(source, session, frontier, semaphore, timeout)
+    plant_list = await scrape_pages(
+        session, urls, lambda soup: source.to_schema(source.parse(soup)),
+        semaphore, timeout, progress, source.name)
+    return remove_repeats(plant_list)
+
+
+async def async_get_data(filename="plant_data.csv", concurrency=10,
+                         timeout=30, progress=None, session=None,
+                         frontier=None, sources=None):
+    """
+    Creates plant_data.csv (or the file filename) from web scraped data,
+    every website is scraped at the same time
+
+    Parameters:
+        filename : str
+            name of the file the data is saved in, see scrape.save_file()
+        concurrency : int
+            maximum number of pages downloaded at the same time
+        timeout : int/float or None
+            seconds before a single page is given up on
+        progress : callable or None
+            called as progress(source, done, total) after each page,
+            source is the name of the website
+        session : aiohttp.ClientSession or None
+            client to use, a new one is created (and closed) if None
+        frontier : sources.URLFrontier or None
+            collects the plant care page urls, a new one is used if None
+        sources : list or None
+            Source objects, every website in sources.SOURCES if None
+
+    Returns:
+        dict : data quality report of the saved plants,
+        see validate.Validator.report()
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await async_get_data(filename, concurrency, timeout,
+                                        progress, session, frontier, sources)
+
+    if frontier is None:
+        frontier = URLFrontier()
+    if sources is None:
+        sources = list(SOURCES.values())
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.ensure_future(
+                async_scrape_source(source, session, frontier, semaphore,
+                                    timeout, progress))
+             for source in sources]
+    try:
+        plant_lists = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    data_dict = merge_results({source.name: plant_list for source, plant_list
+                               in zip(sources, plant_lists)}, sources)
+    validator = validate.Validator()
+    # the plants are validated as they are saved, in the worker thread
+    await asyncio.to_thread(
+        save_file, validate.validate(data_dict,
+                                     *validate.report_files(filename),
+                                     validator), filename)
+    frontier.save()
+    print(f"Data is saved in {filename}")
+    return validator.report()
+
+
+def main():
+    asyncio.run(async_get_data(
+        progress=lambda source, done, total:
+            print(f"{source}: {done}/{total}", end="\r")))
+
+
+if __name__ == "__main__":
+    main()
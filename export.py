@@ -0,0 +1,396 @@
+"""
+Exports the plant data to JSON Lines, Parquet or csv files and reads
+them back for project.py
+
+Records are written one at a time (or one batch at a time for Parquet), so
+the whole output is never built in memory. The list of names is stored as a
+real list (JSON array, Parquet list column) or, in csv files, as one value
+with the names separated by NAME_SEPARATOR, so reading it back doesn't need
+the regular expressions format_data() uses on the old repr strings.
+
+Notes:
+    -Parquet files need the pyarrow library (pip install pyarrow), the other
+    formats only use the standard library and pandas
+
+    -Parquet files always have the columns of parquet_schema() (so the
+    types don't depend on the first records), any other column of the
+    records (ex: from a website added to sources.py) is added as text
+
+    -a record is a plant dictionary like the ones scrape.py makes,
+    Plant objects are turned into records with plant_record()
+"""
+
+import csv # csv export
+import json # JSON Lines export
+import itertools # peeking at the first record
+import os # replacing the Parquet file once it is written
+import pandas as pd # reading files back
+
+
+# separates the names of a plant in csv files, the same as Plant.name uses
+# (names never have commas, scrape.py splits names on them)
+NAME_SEPARATOR = ","
+
+# columns scraped from the websites (see scrape.py), every column that
+# isn't the names or a temperature is text
+FLOAT_COLUMNS = ['temperature max. (c°)', 'temperature min. (c°)']
+TEXT_COLUMNS = ['family', 'common name (fr.)', 'description', 'categories',
+                'origin', 'climat', 'zone', 'growth', 'light ideal',
+                'light tolered', 'watering', 'insects', 'disease', 'appeal',
+                'color of leaf', 'color of blooms', 'blooming season',
+                'perfume', 'avaibility', 'pot diameter (cm)',
+                'height at purchase (m)', 'width at purchase (m)',
+                'height potential (m)', 'width potential (m)',
+                'available sizes (pot ø)', 'bearing', 'pruning', 'style',
+                'use', 'soil']
+
+
+def plant_record(plant):
+    """
+    Turns a Plant object (see project.py) into a record with the same keys
+    as plant_data.csv
+
+    Parameters:
+        plant : Plant or dict
+            dictionaries are returned as they are
+
+    Returns:
+        dict : record for the plant
+    """
+    if isinstance(plant, dict):
+        return plant
+    temp = plant.temp or (None, None)
+    light = plant.light or (None, None)
+    return {'name': list(plant.name),
+            'soil': plant.soil,
+            'temperature max. (c°)': temp[0],
+            'temperature min. (c°)': temp[1],
+            'light ideal': light[0],
+            'light tolered': light[1],
+            'watering': plant.water}
+
+
+def file_format(filename):
+    """
+    Parameters:
+        filename : str
+            name of the data file
+
+    Returns:
+        str : "jsonl", "parquet" or "csv" depending on the file extension
+    """
+    filename = str(filename).lower()
+    if filename.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename.endswith((".parquet", ".pq")):
+        return "parquet"
+    return "csv"
+
+
+def export(plants, filename, **kwargs):
+    """
+    Writes plants to filename in the format of its extension
+
+    Parameters:
+        plants : iterable
+            plant dictionaries or Plant objects
+        filename : str
+            name of the file
+        **kwargs :
+            passed to write_jsonl(), write_parquet() or write_csv()
+
+    Returns:
+        int : number of records written
+    """
+    records = (plant_record(plant) for plant in plants)
+    match file_format(filename):
+        case "jsonl":
+            return write_jsonl(records, filename, **kwargs)
+        case "parquet":
+            return write_parquet(records, filename, **kwargs)
+        case _:
+            return write_csv(records, filename, **kwargs)
+
+
+def write_jsonl(records, filename):
+    """
+    Writes one JSON object per line
+
+    Parameters:
+        records : iterable
+            plant dictionaries
+        filename : str
+            name of the file
+
+    Returns:
+        int : number of records written
+    """
+    written = 0
+    with open(filename, 'w', encoding='utf8') as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+def write_csv(records, filename, fieldnames=None):
+    """
+    Writes a csv file with the names separated by NAME_SEPARATOR
+
+    Parameters:
+        records : iterable
+            plant dictionaries
+        filename : str
+            name of the file
+        fieldnames : list or None
+            columns, the keys of the first record if None
+
+    Returns:
+        int : number of records written
+    """
+    records = iter(records)
+    first = next(records, None)
+    if fieldnames is None:
+        fieldnames = list(first.keys()) if first is not None else ['name']
+
+    written = 0
+    with open(filename, 'w', encoding='utf8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        if first is None:
+            return written
+        for record in itertools.chain([first], records):
+            row = dict(record)
+            row['name'] = NAME_SEPARATOR.join(row['name'])
+            writer.writerow(row)
+            written += 1
+    return written
+
+
+def parquet_schema(extra_columns=()):
+    """
+    Parameters:
+        extra_columns : list
+            columns that aren't in FLOAT_COLUMNS or TEXT_COLUMNS
+            (ex: from a website added to sources.py)
+
+    Returns:
+        pyarrow.Schema : name is list<string>, temperatures are float64
+        and the other columns are strings
+
+    Raises:
+        ImportError: pyarrow is not installed
+    """
+    import pyarrow as pa # only needed for Parquet files
+
+    return pa.schema([pa.field('name', pa.list_(pa.string()))] +
+                     [pa.field(col, pa.float64()) for col in FLOAT_COLUMNS] +
+                     [pa.field(col, pa.string())
+                      for col in TEXT_COLUMNS + list(extra_columns)])
+
+
+def parquet_row(record):
+    """
+    Converts a record to the types of parquet_schema()
+
+    Parameters:
+        record : dict
+            plant dictionary
+
+    Returns:
+        dict : record with the temperatures as floats and
+        the other columns as strings (or None)
+
+    Raises:
+        ValueError: a temperature isn't a number
+    """
+    row = {}
+    for col, val in record.items():
+        if col in FLOAT_COLUMNS and val is not None:
+            # scraped temperatures are strings (ex: "30")
+            row[col] = float(val)
+        elif col == 'name' or val is None or type(val) is str:
+            row[col] = val
+        else:
+            # NaN from pandas is a missing value
+            row[col] = None if val != val else str(val)
+    return row
+
+
+def reopen_parquet(path, schema):
+    """
+    Rewrites a Parquet file that is being written with more columns,
+    the rows already written have null in the new columns
+
+    Parameters:
+        path : str
+            name of the file, its writer is closed
+        schema : pyarrow.Schema
+            columns of the file from now on
+
+    Returns:
+        pyarrow.parquet.ParquetWriter : writer for path, after the
+        rows already written
+    """
+    import pyarrow as pa # only needed for Parquet files
+    import pyarrow.parquet as pq
+
+    old = path + ".old"
+    os.replace(path, old)
+    writer = pq.ParquetWriter(path, schema)
+    try:
+        with open(old, 'rb') as file:
+            source = pq.ParquetFile(file)
+            for i in range(source.num_row_groups):
+                table = source.read_row_group(i)
+                for field in schema:
+                    if field.name not in table.column_names:
+                        table = table.append_column(
+                            field, pa.nulls(len(table), field.type))
+                writer.write_table(table.select(schema.names))
+    except BaseException:
+        writer.close()
+        raise
+    finally:
+        os.remove(old)
+    return writer
+
+
+def write_parquet(records, filename, batch_size=10000):
+    """
+    Writes a Parquet file in batches with the columns of parquet_schema(),
+    columns a record doesn't have are null and columns that aren't known
+    are added as strings
+
+    The file is written under a temporary name and only replaces filename
+    once every record is written, so an error doesn't leave a half
+    written file
+
+    Parameters:
+        records : iterable
+            plant dictionaries
+        filename : str
+            name of the file
+        batch_size : int
+            records in each row group
+
+    Returns:
+        int : number of records written
+
+    Raises:
+        ImportError: pyarrow is not installed
+        ValueError: a record has a temperature that isn't a number
+    """
+    import pyarrow as pa # only needed for Parquet files
+    import pyarrow.parquet as pq
+
+    part = filename + ".part"
+    extra_columns = []
+    schema = parquet_schema()
+    records = iter(records)
+    written = 0
+    writer = None
+    try:
+        while True:
+            batch = [parquet_row(record)
+                     for record in itertools.islice(records, batch_size)]
+            if not batch:
+                break
+            new_columns = [col for col in dict.fromkeys(
+                               col for row in batch for col in row)
+                           if col not in schema.names]
+            if new_columns:
+                extra_columns.extend(new_columns)
+                schema = parquet_schema(extra_columns)
+                if writer is not None:
+                    # rare: a website's new column shows up after the
+                    # first batch, the columns of a file can't change
+                    writer.close()
+                    writer = reopen_parquet(part, schema)
+            if writer is None:
+                writer = pq.ParquetWriter(part, schema)
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+        if writer is None:
+            writer = pq.ParquetWriter(part, schema)
+        writer.close()
+        os.replace(part, filename)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return written
+
+
+def read_jsonl(filename, columns):
+    """
+    Reads a JSON Lines file, only keeping columns
+
+    Parameters:
+        filename : str
+            name of the file
+        columns : list
+            keys to keep (missing keys are NaN)
+
+    Returns:
+        pandas DataFrame : name is a column of lists
+    """
+    rows = []
+    with open(filename, encoding='utf8') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                rows.append([record.get(col) for col in columns])
+    return pd.DataFrame(rows, columns=list(columns))
+
+
+def read_parquet(filename, columns):
+    """
+    Reads a Parquet file, only keeping columns
+
+    Parameters:
+        filename : str
+            name of the file
+        columns : list
+            columns to read
+
+    Returns:
+        pandas DataFrame : name is a column of lists
+    """
+    import pyarrow.parquet as pq # only needed for Parquet files
+
+    available = pq.read_schema(filename).names
+    data = pq.read_table(
+        filename, columns=[col for col in columns if col in available])
+    data = data.to_pandas()
+    data = data.reindex(columns=list(columns))
+    # pyarrow gives numpy arrays for list columns
+    data['name'] = data['name'].map(list)
+    return data
+
+
+def read_file(filename, columns):
+    """
+    Reads a JSON Lines or Parquet file (see read_jsonl()/read_parquet())
+
+    Parameters:
+        filename : str
+            name of the file
+        columns : list
+            columns to read
+
+    Returns:
+        pandas DataFrame : name is a column of lists
+
+    Raises:
+        ValueError: filename is not a JSON Lines or Parquet file
+    """
+    match file_format(filename):
+        case "jsonl":
+            return read_jsonl(filename, columns)
+        case "parquet":
+            return read_parquet(filename, columns)
+        case _:
+            raise ValueError("Not a JSON Lines or Parquet file")
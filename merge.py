@@ -0,0 +1,253 @@
+"""
+Combines the plants scraped from several websites into one list
+
+The websites are read separately (see sources.py), plants that share a
+name are then combined into one (remove_repeats()) and websites that only
+have some of the data (ex: houseplant411's soil) add it to the plants they
+match (supplement(), SoilIndex)
+"""
+
+import re # to match names
+import validate # missing values
+
+
+def merge(primary, supplements=()):
+    """
+    Combines the plants scraped from any number of websites
+
+    Plants with a name in common are combined into one, the first plant's
+    data is kept and the keys it is missing are filled from the later
+    plants (see remove_repeats()), so a website earlier in primary wins
+    but no website's data is lost. Then each supplement adds its data to
+    the plants it matches (see supplement())
+
+    Parameters:
+        primary : list
+            a list of plant dictionaries for each website with full care
+            data, every plant in the result comes from one of these
+        supplements : list
+            (plant list, defaults) for each website that only adds some
+            data (ex: houseplant411's soil), defaults is a dict of the keys
+            the website adds -> value used if no plant matches
+
+    Returns:
+        list : list of dictionaries containing all scraped data
+    """
+    print(f"Combining data from {len(primary) + len(supplements)} websites...")
+    plants = remove_repeats([plant_dict for plant_list in primary
+                             for plant_dict in plant_list])
+    for small_list, defaults in supplements:
+        index = SoilIndex(small_list)
+        plants = [supplement(plant_dict, small_list, defaults, index)
+                  for plant_dict in plants]
+    return remove_repeats(plants)
+
+
+def supplement(plant_dict, small_list, defaults, index=None):
+    """
+    Adds the data of the matching plant in small_list (see SoilIndex) and
+    its alternative names to plant_dict, keys plant_dict already has
+    data for are kept
+
+    Parameters:
+        plant_dict : dictionary
+            A dictionary that represents a plant
+        small_list : list
+            list of plant dictionaries from one website
+        defaults : dict
+            keys taken from small_list -> value used if no plant matches
+        index : SoilIndex or None
+            index of small_list, made from small_list if None
+
+    Returns:
+        dict : plant_dict with the added data
+    """
+    if index is None:
+        index = SoilIndex(small_list)
+    i = index.match(plant_dict)
+    plants = {} if i is None else small_list[i]
+    alt_names = [alt_name for alt_name in plants.get('name', []) if alt_name not in plant_dict['name']]
+    plant_dict['name'].extend(alt_names)
+    for key, val in defaults.items():
+        if validate.is_missing(plant_dict.get(key)):
+            found = plants.get(key)
+            plant_dict[key] = val if validate.is_missing(found) else found
+    return plant_dict
+
+
+def category_words(categories):
+    """
+    Parameters:
+        categories : str or None
+            tropicopia categories (ex: "Cactus & Succulent")
+
+    Returns:
+        list : lowercase words in categories (ex: ["cactus", "succulent"])
+    """
+    return re.findall(r"[\w'.-]+", (categories or "").lower())
+
+
+class SoilIndex:
+    """
+    Index of houseplant411 plant names used by find_soil()/supplement()
+
+    Made once for small_list, matching a plant is then a few dictionary
+    lookups instead of checking every name of every houseplant411 plant
+
+    Attributes
+    ----------
+        names : dict
+            each name -> position of the first plant in small_list
+            that has the name
+        max_words : int
+            most words in a name
+    """
+
+    def __init__(self, small_list):
+        """ Constructor for SoilIndex class """
+        self.names = {}
+        self.max_words = 0
+        for i, plants in enumerate(small_list):
+            for name in plants['name']:
+                # names are matched with the words of categories
+                key = " ".join(category_words(name))
+                if key:
+                    self.names.setdefault(key, i)
+                    self.max_words = max(self.max_words, len(key.split()))
+
+
+    def match(self, plant_dict):
+        """
+        Parameters:
+            plant_dict : dictionary
+                A dictionary that represents a tropicopia plant
+
+        Returns:
+            int or None : position in small_list of the first plant that
+            matches plant_dict, None if no plant matches
+        """
+        names = [" ".join(category_words(name)) for name in plant_dict['name']]
+        found = [self.names[name] for name in names if name in self.names]
+        # every run of up to max_words words in the categories
+        words = category_words(plant_dict.get('categories'))
+        for start in range(len(words)):
+            for end in range(start + 1,
+                             min(start + self.max_words, len(words)) + 1):
+                i = self.names.get(" ".join(words[start:end]))
+                if i is not None:
+                    found.append(i)
+        return min(found) if found else None
+
+
+def substring_match(plant_dict, small_list):
+    """
+    The category rule find_soil() used before SoilIndex: a name matches if
+    it is anywhere in the categories (ex: "ivy" matches "Ivyleaf"),
+    used by soil_match_report()
+
+    Parameters:
+        plant_dict : dictionary
+            A dictionary that represents a tropicopia plant
+        small_list : list
+            houseplant411's list of dictionaries representing plants
+
+    Returns:
+        int or None : position in small_list of the matching plant
+    """
+    categories = (plant_dict.get('categories') or "").lower()
+    for i, plants in enumerate(small_list):
+        for name in plants['name']:
+            if name in plant_dict['name'] or categories.find(name) != -1:
+                return i
+    return None
+
+
+def soil_match_report(big_list, small_list):
+    """
+    Compares the houseplant411 plant find_soil() matches to each
+    tropicopia plant with the old substring rule (see substring_match())
+
+    Parameters:
+        big_list : list
+            tropicopia's list of dictionaries representing plants
+        small_list: list
+            houseplant411's list of dictionaries representing plants
+
+    Returns:
+        list : a dictionary for each plant that is matched differently,
+        with the plant's 'name', 'categories' and the names of the 'old'
+        and 'new' match (None if there is no match)
+    """
+    index = SoilIndex(small_list)
+    report = []
+    for plant_dict in big_list:
+        old = substring_match(plant_dict, small_list)
+        new = index.match(plant_dict)
+        if old != new:
+            report.append({'name': plant_dict['name'],
+                           'categories': plant_dict.get('categories'),
+                           'old': None if old is None else small_list[old]['name'],
+                           'new': None if new is None else small_list[new]['name']})
+    return report
+
+
+def remove_repeats(data_dict):
+    """
+    Combines plants that have the same name into one entry, the first
+    plant is kept with the names of the others and their data for any
+    key it is missing (see validate.is_missing())
+
+    Parameters:
+        data_dict : list
+            list of plant dictionaries
+
+    Returns:
+        data_dict : list
+            shorter list of plant dictionaries with name repeats
+            combined into one dictionary
+    """
+    name_list = [d['name'] for d in data_dict]
+    # index of repeated plants
+    repeats = []
+
+    for i, plant in enumerate(data_dict):
+        names = plant['name']
+        other_plants = name_list[i+1:]
+
+        for j, other_names in enumerate(other_plants):
+            for name in names:
+                if name in other_names:
+                    data_dict[i]['name'].extend(other_names)
+                    fill_missing(data_dict[i], data_dict[i+j+1])
+                    # index of repeated plant, add 1 because index starts at 0
+                    repeats.extend([i+j+1])
+                    break
+
+    indices = sorted(list(set(repeats)), reverse=True)
+    # removes duplicate plant using index
+    for i in indices:
+        if i < len(data_dict):
+            data_dict.pop(i)
+
+    # removing any repeated names in individual plants that slipped through
+    for d in data_dict:
+        d['name'] = list(set(d['name']))
+
+    return data_dict
+
+
+def fill_missing(plant_dict, other):
+    """
+    Copies the data of other into plant_dict for the keys
+    plant_dict doesn't have data for
+
+    Parameters:
+        plant_dict : dict
+            plant that is kept
+        other : dict
+            repeat of the plant
+    """
+    for key, val in other.items():
+        if (key != 'name' and validate.is_missing(plant_dict.get(key)) and
+            not validate.is_missing(val)):
+            plant_dict[key] = val
@@ -0,0 +1,277 @@
+"""
+Command line profiling options for project.py and scrape.py
+
+    python project.py --profile project.prof
+    python scrape.py --profile scrape.prof --trace-memory
+
+--profile runs main() with cProfile and saves the stats to a file that can
+be opened with pstats (python -m pstats project.prof) or turned into a
+flame graph with tools like snakeviz or flameprof.
+
+--trace-memory runs main() with tracemalloc and measures every call of the
+traced functions (ex: format_data(), remove_repeats() and the BeautifulSoup
+parse in scrape_html()), see MemoryTracer for what is reported. Taking
+the snapshots makes the program a lot slower while tracing.
+"""
+
+import sys # report output
+import argparse # command line options
+import cProfile # time profiling
+import tracemalloc # memory profiling
+import inspect # line ranges of traced functions
+import linecache # source lines in the report
+import functools # wrapping traced functions
+import threading # traced calls from several threads
+from collections import defaultdict # totals per line
+
+
+def run(main, argv=None, trace=(), top=10):
+    """
+    Runs main() with the profiling options from the command line
+
+    The stats are still saved and printed if main() ends with sys.exit()
+
+    Parameters:
+        main : callable
+            entry point of the program
+        argv : list or None
+            command line arguments, sys.argv[1:] if None
+        trace : list
+            functions to report memory allocations for
+        top : int
+            default number of lines reported for each function
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", metavar="FILE",
+                        help="save cProfile stats to FILE")
+    parser.add_argument("--trace-memory", metavar="N", type=int, nargs="?",
+                        const=top, default=None,
+                        help="print the N lines that allocated the most "
+                        f"memory in each traced function (default {top})")
+    args = parser.parse_args(argv)
+
+    profiler = cProfile.Profile() if args.profile else None
+    tracer = None
+    if args.trace_memory is not None:
+        # enough frames to see from the allocation up to the traced function
+        tracemalloc.start(50)
+        tracer = MemoryTracer(trace)
+        tracer.install()
+        main = tracer.wrap(main)
+    try:
+        if profiler is not None:
+            profiler.runcall(main)
+        else:
+            main()
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(args.profile)
+            print(f"Profile is saved in {args.profile}", file=sys.stderr)
+        if tracer is not None:
+            tracer.uninstall()
+            tracemalloc.stop()
+            print(tracer.report(args.trace_memory), file=sys.stderr)
+
+
+def line_range(function):
+    """
+    Parameters:
+        function : function
+
+    Returns:
+        tuple(str, int, int) : file name, first and last line of function
+    """
+    lines, first = inspect.getsourcelines(function)
+    return function.__code__.co_filename, first, first + len(lines) - 1
+
+
+def function_key(function):
+    """
+    Returns:
+        tuple(str, int) : file name and first line of function, the same for
+        every copy of a module (ex: scrape.py run as __main__ and imported)
+    """
+    if not inspect.isfunction(function):
+        return None
+    return function.__code__.co_filename, function.__code__.co_firstlineno
+
+
+def memory_totals(stats, functions):
+    """
+    Adds up the memory allocated inside each function
+
+    Parameters:
+        stats : list
+            tracemalloc Statistic or StatisticDiff objects ("traceback"),
+            for StatisticDiffs only the growth is counted
+        functions : list
+            functions to add up allocations for
+
+    Returns:
+        dict : function name -> dict of line number -> (size, count),
+        the line is the one in the function that led to the allocation
+    """
+    ranges = {function.__name__: line_range(function) for function in functions}
+    totals = {name: defaultdict(lambda: [0, 0]) for name in ranges}
+    for stat in stats:
+        size = getattr(stat, "size_diff", stat.size)
+        count = getattr(stat, "count_diff", stat.count)
+        if size <= 0:
+            continue
+        for name, (filename, first, last) in ranges.items():
+            for frame in stat.traceback:
+                if (frame.filename == filename and
+                    first <= frame.lineno <= last):
+                    total = totals[name][frame.lineno]
+                    total[0] += size
+                    total[1] += max(count, 0)
+                    break
+    return {name: {line: tuple(total) for line, total in lines.items()}
+            for name, lines in totals.items()}
+
+
+class MemoryTracer:
+    """
+    Measures the memory allocated inside the traced functions
+
+    The traced functions are replaced by wrappers in every loaded module.
+    A snapshot is taken when the first traced call starts and compared with
+    a snapshot taken when the last running traced call returns (calls in
+    other threads or nested calls share the window), the memory that was
+    allocated in between and is still in use is added to the lines of the
+    traced functions that led to it. So the lines show where the memory a
+    call returns or keeps (ex: the BeautifulSoup tree from scrape_html())
+    was allocated, summed over every call. Memory that is freed before the
+    call returns isn't in the lines, the peak shows it: the most traced
+    memory above the start of the window during a call that opened one.
+
+    Attributes
+    ----------
+        functions : list
+            traced functions
+        lines : dict
+            function name -> dict of line number -> [size, count]
+        calls : dict
+            function name -> number of calls
+        peaks : dict
+            function name -> largest peak (bytes) of a call
+    """
+
+    def __init__(self, functions):
+        """ Constructor for MemoryTracer class """
+        self.functions = list(functions)
+        self.lines = {f.__name__: defaultdict(lambda: [0, 0])
+                      for f in self.functions}
+        self.calls = {f.__name__: 0 for f in self.functions}
+        self.peaks = {f.__name__: 0 for f in self.functions}
+        self._keys = {function_key(f): f.__name__ for f in self.functions}
+        self._lock = threading.Lock()
+        self._running = 0
+        self._start = None
+        self._patched = []
+
+
+    def install(self):
+        """ Replaces the traced functions in every loaded module """
+        for module in list(sys.modules.values()):
+            for attr, val in list(getattr(module, "__dict__", {}).items()):
+                if function_key(val) in self._keys:
+                    self._patched.append((module, attr, val))
+                    setattr(module, attr, self.wrap(val))
+
+
+    def uninstall(self):
+        """ Puts the original functions back """
+        for module, attr, val in self._patched:
+            setattr(module, attr, val)
+        self._patched = []
+
+
+    def wrap(self, function):
+        """
+        Parameters:
+            function : callable
+
+        Returns:
+            callable : function that is measured when called,
+            function itself if it isn't traced
+        """
+        name = self._keys.get(function_key(function))
+        if name is None:
+            return function
+
+        @functools.wraps(function)
+        def traced(*args, **kwargs):
+            opened = self._enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._exit(name, opened)
+        return traced
+
+
+    def _snapshot(self):
+        files = {function.__code__.co_filename for function in self.functions}
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, filename, all_frames=True)
+             for filename in files])
+
+
+    def _enter(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            self._running += 1
+            if self._running > 1:
+                return False
+            self._start = (self._snapshot(), tracemalloc.get_traced_memory()[0])
+            tracemalloc.reset_peak()
+            return True
+
+
+    def _exit(self, name, opened):
+        with self._lock:
+            if opened:
+                peak = tracemalloc.get_traced_memory()[1] - self._start[1]
+                self.peaks[name] = max(self.peaks[name], peak)
+            self._running -= 1
+            if self._running:
+                return
+            before = self._start[0]
+            diff = self._snapshot().compare_to(before, "traceback")
+            for function_name, lines in memory_totals(diff,
+                                                      self.functions).items():
+                for lineno, (size, count) in lines.items():
+                    total = self.lines[function_name][lineno]
+                    total[0] += size
+                    total[1] += count
+
+
+    def report(self, top=10):
+        """
+        Parameters:
+            top : int
+                number of lines reported for each function
+
+        Returns:
+            str : the lines of each function that allocated the most memory
+        """
+        report = ["Memory allocated in traced functions (tracemalloc)",
+                  "lines: allocated during the calls and still in use when "
+                  "they returned, summed over all calls",
+                  "peak: most memory in use above the start of one call, "
+                  "including memory freed before it returned"]
+        for function in self.functions:
+            name = function.__name__
+            lines = self.lines[name]
+            size = sum(total[0] for total in lines.values())
+            report.append(f"---------------\n{name}() {self.calls[name]} " +
+                          f"calls, {size / 1024:.1f} KiB kept, " +
+                          f"peak {self.peaks[name] / 1024:.1f} KiB")
+            ranked = sorted(lines.items(), key=lambda item: item[1][0],
+                            reverse=True)
+            filename = function.__code__.co_filename
+            for lineno, (size, count) in ranked[:top]:
+                source = linecache.getline(filename, lineno).strip()
+                report.append(f"  line {lineno}: {size / 1024:.1f} KiB " +
+                              f"in {count} blocks | {source}")
+        return "\n".join(report)
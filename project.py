@@ -28,16 +28,94 @@ Notes:
 """
 
 import sys # to exit program
+import os # to check if the data file exists
 import re # cleaning up data
 import pandas as pd # translating csv to dataframe
 import string # to format plant care info
 from scrape import get_data # web scrapes tropicopia and houseplant411
+from scrape import remove_repeats, scrape_html # traced by --trace-memory
+import profiling # --profile and --trace-memory options
+import store # optional SQLite backend
+import export # JSON Lines and Parquet files
+from collections import OrderedDict, deque # lookup cache, pending blocks
+import io # reading csv blocks
+from concurrent.futures import ProcessPoolExecutor # reading big csv files
+
+
+class Vocabulary:
+    """
+    Dictionary encoding for care information strings
+
+    The same few light, water and soil descriptions are repeated by almost
+    every plant, so each distinct string is stored once and Plants keep its
+    integer code instead. Comparing codes is also faster than comparing the
+    strings (see filter_plants())
+    """
+
+    def __init__(self):
+        """ Constructor for Vocabulary class """
+        self._codes = {}
+        self._values = []
+
+
+    def encode(self, val):
+        """
+        Parameters:
+            val : str or None
+
+        Returns:
+            int or None : code for val, a new code is made for new strings,
+            anything that isn't a str has no code
+        """
+        if type(val) is not str:
+            return None
+        code = self._codes.get(val)
+        if code is None:
+            code = len(self._values)
+            self._codes[val] = code
+            self._values.append(val)
+        return code
+
+
+    def code(self, val):
+        """
+        Parameters:
+            val : str
+
+        Returns:
+            int or None : code for val, None if val was never encoded
+        """
+        return self._codes.get(val)
+
+
+    def decode(self, code):
+        """
+        Parameters:
+            code : int or None
+
+        Returns:
+            str or None : the string for the code
+        """
+        if code is None:
+            return None
+        return self._values[code]
+
+
+    def __len__(self):
+        return len(self._values)
+
+
+# codes for the soil, light and water strings of every Plant
+care_vocab = Vocabulary()
 
 
 class Plant:
     """
     Class to store care info of a plant
 
+    soil, light and water are stored as care_vocab codes,
+    the properties return the strings
+
     Attributes
     ----------
         name : list of str
@@ -78,14 +156,11 @@ class Plant:
     @property
     def soil(self):
         """ Gets soil property """
-        return self._soil
+        return care_vocab.decode(self._soil)
 
     @soil.setter
     def soil(self, val):
-        if type(val) is str:
-            self._soil = val
-        else:
-            self._soil = None
+        self._soil = care_vocab.encode(val)
 
     @property
     def temp(self):
@@ -96,9 +171,10 @@ class Plant:
     def temp(self, val):
         # plant has both a ideal temp and min temp
         if type(val) is tuple:
-            if (isinstance(val[0], (int,float)) and
-                isinstance(val[1], (int,float))):
-                self._temp = (val[0], val[1])
+            # missing values (None/NaN) are stored as None
+            high, low = [t if isinstance(t, (int,float)) and t == t else None
+                         for t in val[:2]]
+            self._temp = (high, low) if high is not None else None
         # plant only has an ideal temp
         elif isinstance(val, (int,float,str)):
             self._temp = (int(val), None)
@@ -109,28 +185,66 @@ class Plant:
     @property
     def light(self):
         """ Gets light property """
-        return self._light
+        if self._light is None:
+            return None
+        return (care_vocab.decode(self._light[0]),
+                care_vocab.decode(self._light[1]))
     @light.setter
     def light(self, val):
         # plant has both a ideal light and min light
         if type(val) is tuple:
-            self._light = (val[0], val[1])
+            self._light = (care_vocab.encode(val[0]),
+                           care_vocab.encode(val[1]))
         # plant only has an ideal light
         elif type(val) is str:
-            self._light = (val, None)
+            self._light = (care_vocab.encode(val), None)
         else:
             self._light = None
 
     @property
     def water(self):
         """ Gets water property """
-        return self._water
+        return care_vocab.decode(self._water)
     @water.setter
     def water(self, val):
-        if type(val) is str:
-            self._water = val
-        else:
-            self._water = None
+        self._water = care_vocab.encode(val)
+
+
+    def __getstate__(self):
+        # codes are only valid in this process so Plants are pickled
+        # with the strings
+        return {"name": self.name, "soil": self.soil, "temp": self.temp,
+                "light": self.light, "water": self.water}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+    @classmethod
+    def from_codes(cls, name, soil, temp, light, water):
+        """
+        Makes a Plant from values that are already clean, without running
+        the setters (see plant_columns())
+
+        Parameters:
+            name : list
+                lowercase names
+            soil, water : int or None
+                care_vocab codes
+            temp : tuple(int/float, int/float or None) or None
+            light : tuple(int or None, int or None)
+                care_vocab codes
+
+        Returns:
+            Plant
+        """
+        plant = cls.__new__(cls)
+        plant._name = name
+        plant._soil = soil
+        plant._temp = temp
+        plant._light = light
+        plant._water = water
+        return plant
 
 
     def add_names(self, val):
@@ -178,7 +292,7 @@ class Plant:
         if prop in ["temp","light"]:
             if val is None:
                 return string + na
-            elif pd.isna(val[1]):
+            elif val[1] is None:
                 return string + str(val[0])
             elif prop == "temp":
                 return string + str(val[1]) + " to " + str(val[0])
@@ -211,6 +325,161 @@ class Plant:
                 water_string + "\n")
 
 
+class LookupCache:
+    """
+    Bounded least recently used (LRU) cache of plant_info() results
+
+    Names that aren't in the data are cached too (as None) so repeated
+    misspellings don't scan the data every time. The cache remembers which
+    data (and which version of it, for data with a version attribute like
+    Catalog and store.PlantStore) it was filled from and empties itself when
+    asked about other data (ex: after gather_info() reloads plant_data.csv
+    or another process re-scrapes into the database)
+
+    A hit costs a dictionary lookup and reading data.version: an attribute
+    for Catalog, for store.PlantStore a query at most once every
+    PlantStore.check_interval seconds, so a re-scrape by another process
+    is noticed within that time
+
+    Attributes
+    ----------
+        maxsize : int
+            maximum number of cached names
+        hits : int
+            lookups answered from the cache
+        misses : int
+            lookups that had to search the data
+    """
+
+    def __init__(self, maxsize=256):
+        """ Constructor for LookupCache class """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = None
+        self._version = None
+        self._results = OrderedDict()
+
+
+    def lookup(self, data, plant_name):
+        """
+        Same as plant_info(data, plant_name) but uses cached results
+
+        Parameters:
+            data : list
+                list of Plants
+            plant_name : str
+                name to check for, case and extra spaces are ignored
+
+        Returns:
+            (Plant) or None
+        """
+        version = getattr(data, "version", None)
+        if data is not self._data or version != self._version:
+            self.clear()
+            self._data = data
+            self._version = version
+
+        key = normalize_name(plant_name)
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        self.misses += 1
+        chosen = plant_info(data, key)
+        self._results[key] = chosen
+        if len(self._results) > self.maxsize:
+            # drop the least recently used name
+            self._results.popitem(last=False)
+        return chosen
+
+
+    def clear(self):
+        """ Empties the cache (hit/miss counts are kept) """
+        self._data = None
+        self._version = None
+        self._results.clear()
+
+
+    def stats(self):
+        """
+        Returns:
+            dict : hits, misses, hit rate (0 to 1), size and maxsize
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "hit rate": self.hits / total if total else 0.0,
+                "size": len(self._results),
+                "maxsize": self.maxsize}
+
+
+class Catalog(list):
+    """
+    List of Plant objects with a name index, plant_info() uses the index
+    instead of checking every Plant
+
+    Attributes
+    ----------
+        by_name : dict
+            each name -> first Plant in the list with that name
+        version : int
+            number of times Plants were added (see LookupCache)
+    """
+
+    def __init__(self, plants=()):
+        """ Constructor for Catalog class """
+        super().__init__()
+        self.by_name = {}
+        self.version = 0
+        self.merge(list(plants))
+
+
+    def merge(self, plants, index=None):
+        """
+        Adds Plants to the end of the catalog
+
+        Parameters:
+            plants : list
+                list of Plants
+            index : dict or None
+                name -> position in plants (see load_block()),
+                created from plants if None
+        """
+        if index is None:
+            index = name_index(plants)
+        for name, i in index.items():
+            self.by_name.setdefault(name, plants[i])
+        self.extend(plants)
+        self.version += 1
+
+
+# shared by every find_info() call
+lookup_cache = LookupCache()
+
+# only relevant information from the csv file
+# and the new variable names for accessibility
+CSV_COL_NAMES = {'temperature max. (c°)': 'temp max',
+                'temperature min. (c°)': 'temp min',
+                'light ideal': 'light ideal',
+                'light tolered': 'light tolerated',
+                'watering': 'water',
+                'name': 'name',
+                'soil': 'soil'}
+
+# the care information columns only have a few distinct values, reading them
+# as categories stores each value once in the DataFrame
+CSV_DTYPES = {'light ideal': 'category',
+            'light tolered': 'category',
+            'watering': 'category',
+            'soil': 'category'}
+
+# csv files bigger than this (in bytes) are read in blocks of CHUNK_ROWS rows
+CHUNK_THRESHOLD = 64 * 1024 * 1024
+CHUNK_ROWS = 50000
+
+
 def main():
     # read and store data from plant_data.csv
     data = gather_info()
@@ -233,46 +502,224 @@ def main():
                 sys.exit()
 
 
-def gather_info():
+def gather_info(filename="plant_data.csv", chunksize=None, workers=None):
     """
     Reads and stores plant information
     (names, temp max/min, light ideal/min and soil)
     from plant_data.csv in a list of Plant objects
 
+    If filename is a SQLite database (see store.py) the plants are read
+    from the database when they are needed instead.
+    JSON Lines and Parquet files are read with export.py
+
+    Big csv files (over CHUNK_THRESHOLD bytes) are read in blocks by
+    several processes, see load_chunked()
+
+    Parameters:
+        filename : str
+            name of the data file
+        chunksize : int or None
+            number of csv rows each process reads at a time,
+            None only reads in blocks if the file is big
+        workers : int or None
+            number of processes, None uses the number of CPUs
+
     Returns:
         (list) : list of Plant objects created using plant_data.csv
+        or (store.PlantStore) : Plants in the database
     """
-    # only relevant information from the csv file
-    csv_col_names = ['temperature max. (c°)',
-                    'temperature min. (c°)',
-                    'light ideal',
-                    'light tolered',
-                    'watering',
-                    'name',
-                    'soil']
-    try:
-        data = pd.read_csv("plant_data.csv",
-                       usecols=csv_col_names)
-    except FileNotFoundError:
-        print("plant_data.csv not found, data will be scraped...")
+    if store.is_database(filename):
+        if not os.path.exists(filename):
+            print(f"{filename} not found, data will be scraped...")
+            get_data(filename)
+        lookup_cache.clear()
+        return store.PlantStore(filename, factory=make_plant)
+
+    if not os.path.exists(filename):
+        print(f"{filename} not found, data will be scraped...")
         # from scrape.py
-        get_data()
-        data = pd.read_csv("plant_data.csv",
-                       usecols=csv_col_names)
-
+        get_data(filename)
+
+    # cached lookups are from the old data
+    lookup_cache.clear()
+
+    if export.file_format(filename) != "csv":
+        data = export.read_file(filename, list(CSV_COL_NAMES))
+        data = data.astype(CSV_DTYPES).rename(columns=CSV_COL_NAMES)
+        # Parquet files store temperatures as floats, whole numbers are
+        # read as ints like read_csv() does so the plants show the same
+        for col in ['temp max', 'temp min']:
+            temps = pd.to_numeric(data[col], errors='coerce')
+            if temps.notna().all() and (temps % 1 == 0).all():
+                data[col] = temps.astype(int)
+        return format_data(data)
+
+    if chunksize is None and os.path.getsize(filename) > CHUNK_THRESHOLD:
+        chunksize = CHUNK_ROWS
+    if chunksize is not None:
+        return load_chunked(filename, chunksize, workers)
+
+    data = pd.read_csv(filename, usecols=CSV_COL_NAMES, dtype=CSV_DTYPES)
     # change variable names for accessibility
-    new_col_names = ['temp max',
-                    'temp min',
-                    'light ideal',
-                    'light tolerated',
-                    'water',
-                    'name',
-                    'soil']
-    data.columns = new_col_names
+    data = data.rename(columns=CSV_COL_NAMES)
 
     return format_data(data)
 
 
+def load_chunked(filename, chunksize, workers=None):
+    """
+    Reads plant_data.csv in blocks of chunksize rows, each block is parsed
+    in a separate process and sent back as plain columns (see load_block()),
+    the Plants are then made in this process with Plant.from_codes()
+
+    At most two blocks per worker are waiting to be merged at a time, so
+    memory use depends on chunksize and not on the size of the file
+
+    Parameters:
+        filename : str
+            name of the csv file
+        chunksize : int
+            number of rows in each block
+        workers : int or None
+            number of processes, None uses the number of CPUs
+
+    Returns:
+        (Catalog) : list of Plant objects in the same order as the file
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    catalog = Catalog()
+    with open(filename, encoding='utf8', newline='') as file:
+        header = file.readline()
+        if workers == 1:
+            # a worker process would only add pickling and start up time
+            for block in read_blocks(file, chunksize):
+                merge_block(catalog, load_block(header, block))
+            match_temp_types(catalog)
+            return catalog
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            for block in read_blocks(file, chunksize):
+                pending.append(pool.submit(load_block, header, block))
+                if len(pending) >= max_pending:
+                    merge_block(catalog, pending.popleft().result())
+            while pending:
+                merge_block(catalog, pending.popleft().result())
+
+    match_temp_types(catalog)
+    return catalog
+
+
+def read_blocks(file, chunksize):
+    """
+    Splits the rows of a csv file into blocks of text
+
+    Parameters:
+        file : file object
+            open csv file, after the header line
+        chunksize : int
+            number of rows in each block
+
+    Returns:
+        generator : str blocks of at most chunksize rows,
+        quoted values that span several lines are kept in one row
+    """
+    block = []
+    rows = 0
+    quoted = False
+    for line in file:
+        block.append(line)
+        # an odd number of " means a quoted value continues on the next line
+        if line.count('"') % 2:
+            quoted = not quoted
+        if not quoted:
+            rows += 1
+            if rows == chunksize:
+                yield "".join(block)
+                block = []
+                rows = 0
+    if block:
+        yield "".join(block)
+
+
+def load_block(header, block):
+    """
+    Parses one block of csv rows (runs in a worker process)
+
+    Parameters:
+        header : str
+            header line of the csv file
+        block : str
+            rows of the csv file
+
+    Returns:
+        tuple(dict, dict) : the block's plant_columns() and
+        its name index (name -> row in the block)
+    """
+    data = pd.read_csv(io.StringIO(header + block), usecols=CSV_COL_NAMES,
+                       dtype=CSV_DTYPES)
+    data = data.rename(columns=CSV_COL_NAMES)
+    columns = plant_columns(data)
+    return columns, name_index(columns['name'])
+
+
+def merge_block(catalog, result):
+    """
+    Adds the Plants of a load_block() result to catalog
+
+    Parameters:
+        catalog : Catalog
+        result : tuple(dict, dict)
+            load_block() result
+    """
+    columns, index = result
+    catalog.merge(columns_to_plants(columns), index)
+
+
+def match_temp_types(plants):
+    """
+    Makes the temperatures of plants read in blocks the same type as if
+    the whole file was read at once: pandas reads a column as floats if
+    any value is missing or a float, otherwise as ints, so a block
+    without missing values has ints where the others have floats
+
+    Parameters:
+        plants : list
+            list of Plants
+    """
+    floats = [False, False]
+    for plant in plants:
+        if plant._temp is None:
+            floats[0] = True
+            continue
+        for i, t in enumerate(plant._temp):
+            if type(t) is not int:
+                floats[i] = True
+    if not any(floats):
+        return
+    for plant in plants:
+        if plant._temp is not None:
+            plant._temp = tuple(float(t) if is_float and t is not None else t
+                                for t, is_float in zip(plant._temp, floats))
+
+
+def name_index(names):
+    """
+    Parameters:
+        names : list
+            list of Plants or list of name lists
+
+    Returns:
+        dict : each name -> position of the first Plant with that name
+    """
+    index = {}
+    for i, plant in enumerate(names):
+        for name in (plant if type(plant) is list else plant.name):
+            # plant_info returns the first Plant with the name
+            index.setdefault(name, i)
+    return index
+
+
 def format_data(data):
     """
     Stores data from a DataFrame into Plant objects
@@ -284,26 +731,124 @@ def format_data(data):
         plant list : list
             list of Plant objects
     """
+    # temp min, light tolerated have None/NaN values
+    # print(data.isna().any())
+
+    return columns_to_plants(plant_columns(data))
+
+
+def plant_columns(data):
+    """
+    Cleans a DataFrame of plant data into plain lists, one per column,
+    that are cheap to pickle (load_block() sends them between processes)
+
+    The care strings of the block are listed once in 'care' and
+    the care columns have positions in that list
+
+    Parameters:
+        data : pandas DataFrame object
+            has the columns 'name', 'soil', 'temp max', 'temp min',
+            'light ideal', 'light tolerated' and 'water'
+
+    Returns:
+        dict : 'name' -> list of name lists,
+        'care' -> list of the distinct care strings,
+        'soil', 'light ideal', 'light tolerated', 'water' -> lists of
+        positions in 'care' (-1 if there is no information),
+        'temp max', 'temp min' -> lists of numbers (NaN if missing),
+        ints if the column has no missing values
+    """
+    care_cols = ['soil', 'light ideal', 'light tolerated', 'water']
+    # one code per distinct value in all of the care columns
+    values = pd.concat([data[col].astype(object) for col in care_cols],
+                       ignore_index=True)
+    codes, care = pd.factorize(values)
+    care = [val if type(val) is str else None for val in care]
+    columns = {'name': [split_names(names) for names in data['name']],
+               'care': care}
+    for i, col in enumerate(care_cols):
+        col_codes = codes[i * len(data):(i + 1) * len(data)].tolist()
+        # only strings have codes, see Vocabulary.encode()
+        columns[col] = [c if c < 0 or care[c] is not None else -1
+                        for c in col_codes]
+    for col in ['temp max', 'temp min']:
+        columns[col] = pd.to_numeric(data[col], errors='coerce').tolist()
+    return columns
+
+
+def columns_to_plants(columns):
+    """
+    Makes the Plant objects from plant_columns()
+
+    Parameters:
+        columns : dict
+            plant_columns() of a DataFrame
+
+    Returns:
+        list : list of Plant objects
+    """
+    # block positions -> care_vocab codes
+    codes = [care_vocab.encode(val) for val in columns['care']] + [None]
+    soil, light_ideal, light_tolerated, water = [
+        [codes[c] for c in columns[col]]
+        for col in ['soil', 'light ideal', 'light tolerated', 'water']]
     plant_list = []
-    for index, row in data.iterrows():
-        # read_csv returns name as str instead of list of str, remove "[,],',"
+    for i, (names, high, low) in enumerate(zip(columns['name'],
+                                                columns['temp max'],
+                                                columns['temp min'])):
+        # missing temperatures are NaN, same as the Plant.temp setter
+        temp = (high, low if low == low else None) if high == high else None
+        plant_list.append(Plant.from_codes(
+            names, soil[i], temp, (light_ideal[i], light_tolerated[i]),
+            water[i]))
+    return plant_list
+
+
+def split_names(names):
+    """
+    Parameters:
+        names : list or str
+            names of a plant, a str has the names separated by
+            export.NAME_SEPARATOR (",") or is the str of a list
+            (older csv files)
+
+    Returns:
+        list : lowercase names
+
+    Raises:
+        ValueError: Invalid name type
+    """
+    if type(names) is str and names.startswith("["):
+        # older csv files store name as the str of a list, remove "[,],',"
         # Plant object needs names to be in a list
         # also fitting in edge cases where names like
         # "devil's Ivy" was not getting rid of the quotation marks
-        list_names = re.sub(r"\'," ,",",
-                        re.sub(r"\[\'| \'|(\')?\]|\"", "", row['name']))
-        plant = Plant(name = list_names,
-                     soil = row['soil'],
-                     temp = (row['temp max'],row['temp min']),
-                     light = (row['light ideal'],row['light tolerated']),
-                     water = row['water'])
+        names = re.sub(r"\'," ,",",
+                        re.sub(r"\[\'| \'|(\')?\]|\"", "", names))
+    if type(names) is str:
+        return names.lower().split(",")
+    if type(names) is list:
+        return [x.lower() for x in names]
+    raise ValueError("Invalid name type")
 
-        plant_list.append(plant)
 
-    # temp min, light tolerated have None/NaN values
-    # print(data.isna().any())
+def make_plant(row):
+    """
+    Creates a Plant from one row of plant data
 
-    return plant_list
+    Parameters:
+        row : pandas Series or dict
+            has the keys 'name', 'soil', 'temp max', 'temp min',
+            'light ideal', 'light tolerated' and 'water'
+
+    Returns:
+        Plant : Plant object with the row's information
+    """
+    return Plant(name = split_names(row['name']),
+                 soil = row['soil'],
+                 temp = (row['temp max'],row['temp min']),
+                 light = (row['light ideal'],row['light tolerated']),
+                 water = row['water'])
 
 
 def ask_action():
@@ -370,29 +915,88 @@ def find_info(data):
     Asks user for the name of the plant and prints the care information.
     If the plant is not in the data, prints sorry message
 
+    Results are cached in lookup_cache
+
     Parameters:
         data : list
             list of Plants
     """
-    chosen = plant_info(data, input("Plant name: ").lower().strip())
+    chosen = lookup_cache.lookup(data, input("Plant name: "))
     if chosen is not None:
         return chosen
     else:
         return "Sorry, we don't have information for this plant"
 
 
+def filter_plants(data, prop, val):
+    """
+    Finds all the Plants with the exact care information val
+
+    Parameters:
+        data : list
+            list of Plants
+        prop : str
+            "soil", "water", "light ideal" or "light tolerated"
+        val : str
+            care information to look for
+
+    Returns:
+        (list) : list of matching Plants
+
+    Raises:
+        ValueError: Invalid property
+    """
+    # val is turned into a code once, then only ints are compared
+    code = care_vocab.code(val)
+    match prop:
+        case "soil":
+            codes = lambda plant: plant._soil
+        case "water":
+            codes = lambda plant: plant._water
+        case "light ideal":
+            codes = lambda plant: plant._light and plant._light[0]
+        case "light tolerated":
+            codes = lambda plant: plant._light and plant._light[1]
+        case _:
+            raise ValueError("Invalid property")
+    if code is None:
+        return []
+    return [plant for plant in data if codes(plant) == code]
+
+
+def normalize_name(plant_name):
+    """
+    Lowercases a plant name and removes extra spaces
+
+    Parameters:
+        plant_name : str
+            user inputted name
+
+    Returns:
+        str : normalized name (ex: " Snake  Plant" -> "snake plant")
+    """
+    return " ".join(plant_name.lower().split())
+
+
 def plant_info(data, plant_name):
     """
     Searches through data for Plant object that has
     soil, temp, light and water info for the specified plant
 
     Parameters:
+        data : list
+            list of Plants, if data has a by_name lookup
+            (ex: store.PlantStore) it is used instead of a scan
         plant_name (str): alphabetical string
             user inputted name to check for
 
     Returns:
         (Plant) or None
     """
+    by_name = getattr(data, "by_name", None)
+    if by_name is not None:
+        return by_name.get(plant_name)
+
     for Plant in data:
         if plant_name in Plant.name:
             return Plant
@@ -402,4 +1006,4 @@ def plant_info(data, plant_name):
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main, trace=[format_data, remove_repeats, scrape_html])
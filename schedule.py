@@ -0,0 +1,250 @@
+"""
+Care schedules for a collection (inventory) of physical plants
+
+The free text water, light and temperature information of each Plant is
+turned into a rule once (ex: "Water when soil is half dry" -> water every
+7 days), then schedules for a whole inventory are made with pandas in one
+pass instead of looking up every plant with find_info().
+
+Example:
+    engine = ScheduleEngine(gather_info())
+    inventory = pd.DataFrame({"plant id": [1, 2],
+                              "species": ["jade plant", "pothos"]})
+    with open("calendar.csv", "w", newline="") as file:
+        engine.write_calendar(inventory, file, date(2024, 1, 1), days=30)
+
+Notes:
+    -the watering intervals are rough guidelines for an indoor plant,
+    when a plant has more than one watering description the shortest
+    interval is used
+
+    -inventory items with a species that isn't in the data are left out of
+    the calendar, unknown_species() lists them
+"""
+
+import numpy as np # repeating rows for the calendar
+import pandas as pd # inventory and schedule tables
+from datetime import date # calendar start
+from project import gather_info
+
+
+# days between waterings for each watering description
+WATER_INTERVALS = {"keep moist between watering": 3,
+                "must not dry between watering": 3,
+                "change water regularly in the cup": 7,
+                "water when soil is half dry": 7,
+                "can dry between watering": 10,
+                "must dry between watering": 14,
+                "water only when dry": 14}
+
+# short light level for each tropicopia light description
+LIGHT_LEVELS = {"full sun": "full sun",
+                "strong light": "bright indirect",
+                "diffuse light": "medium indirect"}
+
+# columns of the table returned by ScheduleEngine.rules()
+RULE_COLUMNS = ["water every (days)",
+                "light ideal",
+                "light min",
+                "temp min",
+                "temp max"]
+
+
+def water_interval(water):
+    """
+    Parameters:
+        water : str or None
+            Plant.water (ex: "Keep moist between watering  &  Water when
+            soil is half dry")
+
+    Returns:
+        int or None : days between waterings, None if unknown
+    """
+    if water is None:
+        return None
+    intervals = [WATER_INTERVALS.get(" ".join(part.lower().split()))
+                 for part in water.split("&")]
+    intervals = [days for days in intervals if days is not None]
+    return min(intervals) if intervals else None
+
+
+def light_level(light):
+    """
+    Parameters:
+        light : str or None
+            one of Plant.light's values (ex: "Strong light ( 21,500 to ...")
+
+    Returns:
+        str or None : short light level (ex: "bright indirect")
+    """
+    if light is None:
+        return None
+    for description, level in LIGHT_LEVELS.items():
+        if light.lower().startswith(description):
+            return level
+    return None
+
+
+def care_rule(plant):
+    """
+    Turns a Plant's care information into a schedule rule
+
+    Parameters:
+        plant : Plant
+
+    Returns:
+        dict : values for each of RULE_COLUMNS (None if unknown)
+    """
+    light = plant.light or (None, None)
+    temp = plant.temp or (None, None)
+    # light min is the tolerated light, or the ideal light if there is none
+    return {"water every (days)": water_interval(plant.water),
+            "light ideal": light_level(light[0]),
+            "light min": light_level(light[1] or light[0]),
+            "temp min": temp[1],
+            "temp max": temp[0]}
+
+
+class ScheduleEngine:
+    """
+    Makes care schedules for inventories of plants
+
+    Attributes
+    ----------
+        data : list
+            list of Plants the species names are looked up in
+    """
+
+    def __init__(self, data):
+        """ Constructor for ScheduleEngine class """
+        self.data = data
+        self._rules = None
+
+
+    def rules(self):
+        """
+        Care rules for every name of every plant, made once per Plant
+
+        Returns:
+            pandas DataFrame : one row per name ("species" column,
+            lowercase) with RULE_COLUMNS
+        """
+        if self._rules is None:
+            names = []
+            rules = []
+            for plant in self.data:
+                rule = care_rule(plant)
+                for name in plant.name:
+                    names.append(name)
+                    rules.append(rule)
+            rules = pd.DataFrame(rules, columns=RULE_COLUMNS)
+            rules.insert(0, "species", names)
+            # plant_info() uses the first Plant with the name
+            self._rules = rules.drop_duplicates("species").set_index("species")
+        return self._rules
+
+
+    def care_table(self, inventory):
+        """
+        Parameters:
+            inventory : pandas DataFrame
+                "plant id" and "species" columns
+
+        Returns:
+            pandas DataFrame : inventory with RULE_COLUMNS added
+        """
+        # same as normalize_name() for the whole column
+        species = inventory["species"].str.lower().str.split().str.join(" ")
+        rules = self.rules().reindex(species)
+        rules.index = inventory.index
+        return pd.concat([inventory, rules], axis=1)
+
+
+    def unknown_species(self, inventory):
+        """
+        Returns:
+            list : species in inventory that aren't in the data
+        """
+        table = self.care_table(inventory)
+        known = table[RULE_COLUMNS].notna().any(axis=1)
+        return sorted(set(table.loc[~known, "species"]))
+
+
+    def calendar(self, inventory, start=None, days=30, chunksize=10000):
+        """
+        Watering dates for every plant in the inventory
+
+        Parameters:
+            inventory : pandas DataFrame
+                "plant id" and "species" columns
+            start : datetime.date or None
+                first day of the calendar, today if None
+            days : int
+                length of the calendar
+            chunksize : int
+                inventory rows in each returned table
+
+        Returns:
+            generator : pandas DataFrames with the columns "plant id",
+            "species", "date" and "task", sorted by plant then date
+        """
+        if start is None:
+            start = date.today()
+        start = np.datetime64(start, "D")
+        for first in range(0, len(inventory), chunksize):
+            table = self.care_table(inventory.iloc[first:first + chunksize])
+            interval = table["water every (days)"].to_numpy(dtype=float)
+            known = ~np.isnan(interval)
+            table = table[known]
+            interval = interval[known].astype(int)
+
+            # waterings on day 0, interval, 2*interval... before days
+            counts = (days - 1) // interval + 1
+            rows = np.repeat(np.arange(len(table)), counts)
+            # position of each watering within its plant (0, 1, 2...)
+            step = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts,
+                                                    counts)
+            yield pd.DataFrame({
+                "plant id": table["plant id"].to_numpy()[rows],
+                "species": table["species"].to_numpy()[rows],
+                "date": start + step * interval[rows],
+                "task": "water"})
+
+
+    def write_calendar(self, inventory, file, start=None, days=30,
+                       chunksize=10000):
+        """
+        Writes the calendar to a csv file one chunk at a time
+
+        Parameters:
+            inventory : pandas DataFrame
+                "plant id" and "species" columns
+            file : file object
+                open csv file
+            start, days, chunksize :
+                see calendar()
+
+        Returns:
+            int : number of rows written
+        """
+        written = 0
+        header = True
+        for table in self.calendar(inventory, start, days, chunksize):
+            table.to_csv(file, header=header, index=False)
+            header = False
+            written += len(table)
+        return written
+
+
+def main():
+    engine = ScheduleEngine(gather_info())
+    inventory = pd.read_csv(input("Inventory csv (plant id, species): "))
+    for species in engine.unknown_species(inventory):
+        print(f"No care information for {species}")
+    with open("calendar.csv", "w", encoding="utf8", newline="") as file:
+        engine.write_calendar(inventory, file)
+    print("Calendar is saved in calendar.csv")
+
+
+if __name__ == "__main__":
+    main()
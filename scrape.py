@@ -19,38 +19,81 @@ Notes:
     -for data cleaning the pandas library was not used in order to practice
     using different data structures in base python
 """
-import requests # to get html from webpages
-from bs4 import BeautifulSoup as bs # extract data from html
 import re # to clean data
-import csv # to save data into a separate file
+import store # optional SQLite backend
+import export # JSON Lines, Parquet and csv files
+import profiling # --profile and --trace-memory options
+import validate # data quality checks before saving
+import sources # the websites, the two below are registered at the end
+# moved to merge.py and sources.py, still importable from scrape
+from merge import (
+    merge,
+    supplement,
+    category_words,
+    SoilIndex,
+    substring_match,
+    soil_match_report,
+    remove_repeats)
+from sources import (
+    PLANT_URL_PATTERNS,
+    normalize_url,
+    classify_url,
+    URLFrontier,
+    Source,
+    scrape_listing,
+    scrape_html)
 
 
 def main():
     get_data()
 
-def get_data():
-    """ Creates plant_data.csv from web scraped data """
-    save_file(combine(scrape_trop(), scrape_411()))
-    print("Data is saved in plant_data.csv")
+def get_data(filename="plant_data.csv"):
+    """
+    Creates plant_data.csv (or the file filename) from web scraped data
+    of every website in sources.SOURCES
+
+    The data quality report and quarantined plants are saved next to it
+    (see validate.report_files())
 
-def save_file(data_dict):
+    Parameters:
+        filename : str
+            name of the file the data is saved in, see save_file()
     """
-    Saves formatted and cleaned data to a csv file
+    frontier = URLFrontier()
+    # every website is scraped at the same time, see sources.py
+    data_dict = sources.scrape_all(frontier)
+    # plants with bad data are left out as they are saved, see validate.py
+    save_file(validate.validate(data_dict, *validate.report_files(filename)),
+              filename)
+    frontier.save()
+    print(f"Data is saved in {filename}")
+
+def save_file(data_dict, filename="plant_data.csv"):
+    """
+    Saves formatted and cleaned data to a csv file,
+    or to a SQLite database if filename ends in .db/.sqlite/.sqlite3,
+    JSON Lines (.jsonl) and Parquet (.parquet) files are also supported
+    (see export.py)
+
+    In the csv file the names of a plant are separated by
+    export.NAME_SEPARATOR
 
     Parameters:
-        data_dict : list
-            data in the form of a list of dictionaries
+        data_dict : iterable
+            data in the form of a list (or a generator) of dictionaries
+        filename : str
+            name of the file the data is saved in
     """
     print("Saving data to file...")
-    with open('plant_data.csv', 'w', encoding='utf8', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=data_dict[0].keys())
-        writer.writeheader()
-        writer.writerows(data_dict)
+    if store.is_database(filename):
+        store.save_plants(filename, data_dict)
+        return
+    export.export(data_dict, filename)
 
 
 def combine(big_list, small_list):
     """
-    Combines data from big_list and small_list
+    Combines data from big_list and small_list, see merge()
 
     Parameters:
         big_list : list
@@ -64,40 +107,45 @@ def combine(big_list, small_list):
         list : list of dictionaries containing all scraped data
         about houseplants from tropicopia and houseplant411
     """
-    print("Combining data from both websites...")
-    combined = [find_soil(d, small_list) for d in big_list]
-    return remove_repeats(combined)
+    return merge([big_list], [(small_list, NO_SOIL)])
 
-def find_soil(plant_dict, small_list):
+def find_soil(plant_dict, small_list, index=None):
     """
     Adds small_list's soil data and any additional alternative
     names for a plant to the dictionary plant_dict
 
+    The first plant in small_list that shares a name with plant_dict,
+    or whose name is a whole word (or words) of plant_dict's categories,
+    is used
+
     Parameters:
         plant_dict : dictionary
             A dictionary that represents a plant without soil data
         small_list : list
             list of dictionaries,
             each represent a plant with only name and soil data
+        index : SoilIndex or None
+            index of small_list, made from small_list if None
+            (make it once when calling find_soil for many plants)
 
     Returns:
         dict : plant dictionary that has soil data
     """
-    for plants in small_list:
-        for name in plants['name']:
-            if (name in plant_dict['name'] or
-                plant_dict['categories'].lower().find(name) != -1):
-                alt_names = [alt_name for alt_name in plants['name'] if alt_name not in plant_dict['name']]
-                plant_dict['name'].extend(alt_names)
-                soil_info = next(d['soil'] for d in small_list if d["name"] == plants['name'])
-                plant_dict['soil'] = soil_info
-                return plant_dict
-
-    plant_dict['soil'] = "No information available"
-    return plant_dict
+    return supplement(plant_dict, small_list, NO_SOIL, index)
+
+# soil data of plants houseplant411 doesn't have
+NO_SOIL = {'soil': "No information available"}
+# page that has the list of all the urls for each houseplant411 plant care page
+URL_411 = "https://www.houseplant411.com/houseplant?popup=2"
+# tropicopia's list of plants, links to more listing pages and the plant pages
+URL_TROP = "http://www.tropicopia.com/house-plant/index.html"
+
+# tropicopia pages that can link to more plant pages
+TROP_LISTING_PATTERN = re.compile(
+    r"^https?://(www\.)?tropicopia\.com/house-plant/[\w./-]*\.html?$")
 
 
-def scrape_411():
+def scrape_411(frontier=None):
     """
     Scrapes data from houseplant411 and stores each plant in a
     dictionary where all the keys are name and soil
@@ -106,18 +154,19 @@ def scrape_411():
 
     Note: it takes a few minutes to process all the data
 
+    Parameters:
+        frontier : URLFrontier or None
+            collects the plant care page urls, a new one is used if None
+
     Returns:
         list : list of dicts with each dict being a single plant
     """
-    # URL has list of all the urls for each plant care page
-    URL = "https://www.houseplant411.com/houseplant?popup=2"
-    soup411 = scrape_html(URL)
+    if frontier is None:
+        frontier = URLFrontier()
+    plant411_urls = urls_411(frontier)
 
-    plant411_urls = []
-    for link in soup411.find_all('a'):
-        plant411_urls.append(link.get('href'))
-
-    print("Reading houseplant411 pages...")
+    print(f"Reading {len(plant411_urls)} houseplant411 pages " +
+          f"({len(frontier.new_urls('houseplant411'))} new)...")
     plant_list = []
     for link in plant411_urls:
         plant_list.append(read_411_page(link))
@@ -125,6 +174,49 @@ def scrape_411():
     return remove_repeats(plant_list)
 
 
+def urls_411(frontier, fetch=None):
+    """
+    Finds the urls of the houseplant411 plant pages on URL_411,
+    the saved urls are used if URL_411 can't be read
+
+    Parameters:
+        frontier : URLFrontier
+            collects the plant care page urls
+        fetch : callable or None
+            reads a listing page url into a BeautifulSoup object or None,
+            scrape_listing() if None
+
+    Returns:
+        list : houseplant411 urls in frontier
+    """
+    soup411 = (fetch or scrape_listing)(URL_411)
+    if soup411 is None:
+        return frontier.urls("houseplant411")
+    return find_411_urls(soup411, frontier)
+
+
+def find_411_urls(soup411, frontier):
+    """
+    Adds the urls of the plant care pages on houseplant411's list of plants
+    to frontier, duplicates and links to other pages are left out
+
+    Parameters:
+        soup411 : BeautifulSoup object
+            parsed html of URL_411
+        frontier : URLFrontier
+            collects the plant care page urls
+
+    Returns:
+        list : houseplant411 urls in frontier
+    """
+    for link in soup411.find_all('a'):
+        frontier.add(link.get('href'), URL_411)
+    # URL_411 lists every plant
+    frontier.mark_complete("houseplant411")
+
+    return frontier.urls("houseplant411")
+
+
 def read_411_page(url):
     """
     Stores information from a houseplant411 webpage into a dictionary
@@ -137,9 +229,23 @@ def read_411_page(url):
     ReturnsL
         dict : contains name and soil information on the plant
     """
+    return parse_411_page(scrape_html(url))
+
+
+def parse_411_page(soup):
+    """
+    Stores information from the html of a houseplant411 webpage into a
+    dictionary, see read_411_page()
+
+    Parameters:
+        soup : BeautifulSoup object
+            parsed html of the webpage
+
+    Returns:
+        dict : contains name and soil information on the plant
+    """
     data = []
     var_name = ["name","soil"]
-    soup = scrape_html(url)
 
     # some names contain “ double quotations that aren't the normal kind
     # anything after a en or em hyphen can be discarded
@@ -183,7 +289,7 @@ def read_411_page(url):
     return {var_name[i]: data[i] for i in range(len(var_name))}
 
 
-def scrape_trop():
+def scrape_trop(frontier=None):
     """
     Scrapes all houseplant data from tropicopia and stores each plant in a
     dictionary where all the keys are plant variables and the values are the
@@ -193,22 +299,106 @@ def scrape_trop():
 
     Note: it takes a few minutes to process all the data
 
+    Parameters:
+        frontier : URLFrontier or None
+            collects the plant care page urls, a new one is used if None
+
     Returns:
         list : list of dicts with each dict being a single plant
     """
-    # tropicopia's urls for each plant are in the form
-    # "http://www.tropicopia.com/house-plant/detail.np/detail-##.html"
-    # numbers < 10 have a zero in front and it goes all the way to 355
-    print("Reading tropicopia pages...")
+    if frontier is None:
+        frontier = URLFrontier()
+    urls = trop_urls(frontier)
+
+    print(f"Reading {len(urls)} tropicopia pages " +
+          f"({len(frontier.new_urls('tropicopia'))} new)...")
     plant_list = []
-    for i in range(355):
-        plant_list.append(clean_trop(read_trop_page(
-            "http://www.tropicopia.com/house-plant/detail.np/detail-"+
-            f"{i+1:02}" + ".html")))
+    for url in urls:
+        plant_list.append(clean_trop(read_trop_page(url)))
 
     return remove_repeats(plant_list)
 
 
+def trop_urls(frontier, max_pages=50, fetch=None):
+    """
+    Finds the urls of all the tropicopia plant pages by following the
+    listing pages starting from URL_TROP
+
+    Listing pages that can't be read are skipped, the saved urls are then
+    kept (see URLFrontier.mark_complete())
+
+    Parameters:
+        frontier : URLFrontier
+            collects the plant care page urls
+        max_pages : int
+            most listing pages read
+        fetch : callable or None
+            reads a listing page url into a BeautifulSoup object or None,
+            scrape_listing() if None
+
+    Returns:
+        list : urls of all the tropicopia plant pages
+    """
+    fetch = fetch or scrape_listing
+    to_visit = [URL_TROP]
+    visited = set()
+    complete = True
+    while to_visit and len(visited) < max_pages:
+        url = to_visit.pop(0)
+        visited.add(url)
+        soup = fetch(url)
+        if soup is None:
+            complete = False
+            continue
+        to_visit.extend(link for link in find_trop_urls(soup, url, frontier)
+                        if link not in visited and link not in to_visit)
+    if complete and not to_visit:
+        frontier.mark_complete("tropicopia")
+
+    return frontier.urls("tropicopia") or numbered_trop_urls()
+
+
+def find_trop_urls(soup, url, frontier):
+    """
+    Adds the plant care page links on a tropicopia listing page to frontier
+
+    Parameters:
+        soup : BeautifulSoup object
+            parsed html of the listing page
+        url : str
+            url of the listing page
+        frontier : URLFrontier
+            collects the plant care page urls
+
+    Returns:
+        list : links to other listing pages
+    """
+    listings = []
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if frontier.add(href, url) is None:
+            listing = normalize_url(href, url)
+            if listing is not None and TROP_LISTING_PATTERN.match(listing):
+                listings.append(listing)
+
+    return listings
+
+
+def numbered_trop_urls():
+    """
+    Used when no tropicopia plant pages can be found (ex: the listing pages
+    changed and there are no saved urls from the last run)
+
+    Returns:
+        list : urls of the 355 numbered tropicopia plant pages
+    """
+    # tropicopia's urls for each plant are in the form
+    # "http://www.tropicopia.com/house-plant/detail.np/detail-##.html"
+    # numbers < 10 have a zero in front and it goes all the way to 355
+    return ["http://www.tropicopia.com/house-plant/detail.np/detail-" +
+            f"{i+1:02}" + ".html" for i in range(355)]
+
+
 def clean_trop(plant_dict):
     """
     Merges all name type variables into one key "name" for a
@@ -264,7 +454,21 @@ def read_trop_page(url):
     ReturnsL
         dict : contains information on the plant
     """
-    plant_page = scrape_html(url)
+    return parse_trop_page(scrape_html(url))
+
+
+def parse_trop_page(plant_page):
+    """
+    Stores information from the html of a tropicopia webpage into a
+    dictionary, see read_trop_page()
+
+    Parameters:
+        plant_page : BeautifulSoup object
+            parsed html of the webpage
+
+    Returns:
+        dict : contains information on the plant
+    """
     # <p class="ar12D"> contains all the relevant information
     page = plant_page.find_all("p",class_="ar12D")
     raw_data = []
@@ -295,62 +499,44 @@ def read_trop_page(url):
     return {var : values[i] for i, var in enumerate(var_names)}
 
 
-def remove_repeats(data_dict):
-    """
-    Combines plants that have the same name into one entry
+class Tropicopia(Source):
+    """ https://www.tropicopia.com/, has everything but soil data """
+    name = "tropicopia"
+    url_pattern = re.compile(
+        r"^https?://(www\.)?tropicopia\.com/house-plant/detail\.np/"
+        r"detail-\d+\.html$")
 
-    Parameters:
-        data_dict : list
-            list of plant dictionaries
+    def discover(self, frontier, fetch=None):
+        return trop_urls(frontier, fetch=fetch)
 
-    Returns:
-        data_dict : list
-            shorter list of plant dictionaries with name repeats
-            combined into one dictionary
-    """
-    name_list = [d['name'] for d in data_dict]
-    # index of repeated plants
-    repeats = []
 
-    for i, plant in enumerate(data_dict):
-        names = plant['name']
-        other_plants = name_list[i+1:]
+    def parse(self, soup):
+        return parse_trop_page(soup)
 
-        for j, other_names in enumerate(other_plants):
-            for name in names:
-                if name in other_names:
-                    data_dict[i]['name'].extend(other_names)
-                    # index of repeated plant, add 1 because index starts at 0
-                    repeats.extend([i+j+1])
-                    break
 
-    indices = sorted(list(set(repeats)), reverse=True)
-    # removes duplicate plant using index
-    for i in indices:
-        if i < len(data_dict):
-            data_dict.pop(i)
+    def to_schema(self, plant_dict):
+        return clean_trop(plant_dict)
 
-    # removing any repeated names in individual plants that slipped through
-    for d in data_dict:
-        d['name'] = list(set(d['name']))
 
-    return data_dict
+class Houseplant411(Source):
+    """ https://www.houseplant411.com/houseplant, names and soil data """
+    name = "houseplant411"
+    url_pattern = re.compile(
+        r"^https?://(www\.)?houseplant411\.com/houseplant/[\w-]+$")
+    primary = False
+    fields = NO_SOIL
 
+    def discover(self, frontier, fetch=None):
+        return urls_411(frontier, fetch)
 
-def scrape_html(url):
-    """
-    Returns the html content for a webpage
 
-    Parameters:
-        url : str
-            webpage url as a string
+    def parse(self, soup):
+        return parse_411_page(soup)
 
-    Returns:
-        BeautifulSoup object : representation of the parsed html
-    """
-    page = requests.get(url)
-    return bs(page.content, "html.parser")
+
+sources.register(Tropicopia())
+sources.register(Houseplant411())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profiling.run(main, trace=[remove_repeats, scrape_html])
\ No newline at end of file
@@ -0,0 +1,423 @@
+"""
+Websites the scraper reads plant data from
+
+Each website is a Source: it finds the urls of its plant care pages,
+parses one page and maps the data to the keys in plant_data.csv.
+scrape_all() runs every registered source at the same time and merges the
+results with merge.merge(), so adding a website doesn't add its whole
+scrape time to the total. The links found on the websites are collected
+by URLFrontier.
+
+tropicopia and houseplant411 are registered by scrape.py
+
+Adding a website:
+    class MySource(Source):
+        name = "mysite"
+        url_pattern = re.compile(r"^https?://mysite\\.com/plants/[\\w-]+$")
+
+        def discover(self, frontier, fetch=None):
+            ...
+
+        def parse(self, soup):
+            ...
+
+    register(MySource())
+
+Notes:
+    -every plant in the saved data comes from a primary source (full care
+    data), the other sources only add the keys in fields (ex: houseplant411's
+    soil) to the plants they match, see merge.supplement()
+
+    -each source runs in its own thread, the time is spent waiting on the
+    websites so threads are enough (the pages of one website are still read
+    one at a time so a website isn't flooded)
+"""
+
+import requests # to get html from webpages
+from bs4 import BeautifulSoup as bs # extract data from html
+import json # to save discovered urls
+import os # to check if the url file exists
+from urllib.parse import urljoin, urldefrag, urlsplit, urlunsplit # clean urls
+from concurrent.futures import ThreadPoolExecutor # runs the sources at the same time
+from merge import merge, remove_repeats # combines the websites' plants
+
+
+# urls of the plant care pages for each website, see register()
+PLANT_URL_PATTERNS = {}
+
+
+def normalize_url(href, base):
+    """
+    Makes a link absolute and removes anything that doesn't change the page
+
+    Parameters:
+        href : str or None
+            link as written in the html
+        base : str
+            url of the page the link is on
+
+    Returns:
+        str or None : cleaned url (no #fragment, no trailing "/",
+        lowercase host), None if the link doesn't go to a webpage
+    """
+    if not href:
+        return None
+    url, _ = urldefrag(urljoin(base, href.strip()))
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return None
+    return urlunsplit((parts.scheme, parts.netloc.lower(),
+                       parts.path.rstrip("/") or "/", parts.query, ""))
+
+
+def classify_url(url):
+    """
+    Parameters:
+        url : str
+            normalized url
+
+    Returns:
+        str or None : the website (a name in SOURCES) if url is one of its
+        plant care pages, None for any other page
+    """
+    for source, pattern in PLANT_URL_PATTERNS.items():
+        if pattern.match(url):
+            return source
+    return None
+
+
+class URLFrontier:
+    """
+    Plant care page urls found while scraping
+
+    Links are normalized and classified before anything is downloaded so
+    only plant care pages are read, and each page is only read once.
+    The urls are saved between runs and kept until every listing page of
+    the website is read in one run: if a listing page can't be read the
+    urls from the last run are still used
+
+    Attributes
+    ----------
+        filename : str
+            json file the urls are saved in
+        known : dict
+            website -> list of urls from the last run
+        found : dict
+            website -> list of urls found in this run
+        complete : set
+            websites whose listing pages were all read in this run
+    """
+
+    def __init__(self, filename="plant_urls.json"):
+        """ Constructor for URLFrontier class """
+        self.filename = filename
+        self.known = {}
+        if filename is not None and os.path.exists(filename):
+            with open(filename, encoding='utf8') as file:
+                self.known = json.load(file)
+        self.found = {source: {} for source in PLANT_URL_PATTERNS}
+        self.complete = set()
+
+
+    def add(self, href, base):
+        """
+        Adds a link if it goes to a plant care page
+
+        Parameters:
+            href : str or None
+                link as written in the html
+            base : str
+                url of the page the link is on
+
+        Returns:
+            str or None : the website of the plant care page,
+            None if the link was ignored
+        """
+        url = normalize_url(href, base)
+        if url is None:
+            return None
+        source = classify_url(url)
+        if source is not None:
+            # dict keeps the order the links were found in
+            self.found.setdefault(source, {})[url] = None
+        return source
+
+
+    def mark_complete(self, source):
+        """
+        Records that every listing page of the website was read,
+        the urls from the last run that weren't found again are dropped
+
+        Parameters:
+            source : str
+                name of the website
+        """
+        self.complete.add(source)
+
+
+    def urls(self, source):
+        """
+        Parameters:
+            source : str
+                name of the website
+
+        Returns:
+            list : urls of the website's plant care pages found in this run,
+            followed by the urls from the last run that weren't found again
+            (unless the website is complete)
+        """
+        found = self.found.get(source, {})
+        if found and source in self.complete:
+            return list(found)
+        return list(found) + [url for url in self.known.get(source, [])
+                              if url not in found]
+
+
+    def new_urls(self, source):
+        """
+        Returns:
+            list : urls found in this run that weren't found last run
+        """
+        known = set(self.known.get(source, []))
+        return [url for url in self.found.get(source, {}) if url not in known]
+
+
+    def save(self):
+        """ Saves the urls so the next run can use them """
+        if self.filename is None:
+            return
+        urls = {source: self.urls(source) for source in PLANT_URL_PATTERNS}
+        with open(self.filename, 'w', encoding='utf8') as file:
+            json.dump(urls, file, indent=1)
+
+
+def scrape_listing(url):
+    """
+    Returns the html content for a listing page (a page that links to the
+    plant care pages), or None if it can't be read
+
+    Parameters:
+        url : str
+            webpage url as a string
+
+    Returns:
+        BeautifulSoup object or None : representation of the parsed html,
+        None for network errors and error pages
+    """
+    try:
+        page = requests.get(url, timeout=30)
+    except requests.RequestException as error:
+        print(f"Could not read {url}: {error}")
+        return None
+    if page.status_code != 200:
+        print(f"Could not read {url}: status {page.status_code}")
+        return None
+    return bs(page.content, "html.parser")
+
+
+def scrape_html(url):
+    """
+    Returns the html content for a webpage
+
+    Parameters:
+        url : str
+            webpage url as a string
+
+    Returns:
+        BeautifulSoup object : representation of the parsed html
+    """
+    page = requests.get(url)
+    return bs(page.content, "html.parser")
+
+
+class Source:
+    """
+    Base class for the websites, subclasses need name, url_pattern,
+    discover() and parse()
+
+    Attributes
+    ----------
+        name : str
+            name of the website, used by URLFrontier and work_queue.py
+        url_pattern : re.Pattern
+            matches the urls of the website's plant care pages
+        primary : bool
+            True if the website has full care data
+        fields : dict
+            for sources that aren't primary, the keys added to the plants ->
+            value used if no plant matches
+    """
+    name = None
+    url_pattern = None
+    primary = True
+    fields = {}
+
+    def discover(self, frontier, fetch=None):
+        """
+        Finds the urls of the plant care pages
+
+        Parameters:
+            frontier : URLFrontier
+                collects the plant care page urls
+            fetch : callable or None
+                reads a listing page url into a BeautifulSoup object or None
+                if it can't be read, scrape_listing() if None
+                (async_scrape.py passes its own)
+
+        Returns:
+            list : urls of the plant care pages
+        """
+        raise NotImplementedError
+
+
+    def parse(self, soup):
+        """
+        Parameters:
+            soup : BeautifulSoup object
+                parsed html of a plant care page
+
+        Returns:
+            dict : information on the plant, as it is on the page
+        """
+        raise NotImplementedError
+
+
+    def to_schema(self, plant_dict):
+        """
+        Maps the data from parse() to the keys in plant_data.csv,
+        'name' is a list of names
+
+        Parameters:
+            plant_dict : dict
+                data from parse()
+
+        Returns:
+            dict : plant dictionary
+        """
+        return plant_dict
+
+
+    def read(self, url):
+        """
+        Parameters:
+            url : str
+                plant care page url
+
+        Returns:
+            dict : plant dictionary for the page
+        """
+        return self.to_schema(self.parse(scrape_html(url)))
+
+
+    def scrape(self, frontier):
+        """
+        Reads every plant care page of the website
+
+        Parameters:
+            frontier : URLFrontier
+                collects the plant care page urls
+
+        Returns:
+            list : list of dicts with each dict being a single plant
+        """
+        urls = self.discover(frontier)
+        print(f"Reading {len(urls)} {self.name} pages " +
+              f"({len(frontier.new_urls(self.name))} new)...")
+        return remove_repeats([self.read(url) for url in urls])
+
+
+# name -> Source, in the order the sources are merged
+SOURCES = {}
+
+
+def register(source):
+    """
+    Adds a website to SOURCES, its plant care pages are then
+    collected by URLFrontier
+
+    Parameters:
+        source : Source
+
+    Raises:
+        TypeError: source has no name or url_pattern, or its class
+        doesn't override discover() and parse() (checked here so a bad
+        website fails right away instead of in the middle of a scrape)
+    """
+    kind = type(source).__name__
+    if not isinstance(source, Source):
+        raise TypeError(f"{kind} is not a Source")
+    if not source.name or source.url_pattern is None:
+        raise TypeError(f"{kind} needs a name and a url_pattern")
+    for method in ["discover", "parse"]:
+        if getattr(type(source), method) is getattr(Source, method):
+            raise TypeError(f"{kind} doesn't override Source.{method}()")
+    PLANT_URL_PATTERNS[source.name] = source.url_pattern
+    SOURCES[source.name] = source
+
+
+def run_sources(frontier, sources=None, workers=None):
+    """
+    Scrapes every source at the same time
+
+    Parameters:
+        frontier : URLFrontier
+            collects the plant care page urls
+        sources : list or None
+            Source objects, every registered source if None
+        workers : int or None
+            most sources scraped at the same time, all of them if None
+
+    Returns:
+        dict : source name -> list of plant dictionaries
+    """
+    if sources is None:
+        sources = list(SOURCES.values())
+    if not sources:
+        return {}
+    with ThreadPoolExecutor(max_workers=workers or len(sources)) as executor:
+        futures = {source.name: executor.submit(source.scrape, frontier)
+                   for source in sources}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def merge_results(results, sources=None):
+    """
+    Merges the plants of each source (see merge.merge())
+
+    Parameters:
+        results : dict
+            source name -> list of plant dictionaries
+        sources : list or None
+            Source objects in the order they are merged,
+            every registered source if None
+
+    Returns:
+        list : list of dictionaries containing all scraped data
+    """
+    if sources is None:
+        sources = list(SOURCES.values())
+    sources = [source for source in sources if source.name in results]
+    return merge([results[source.name] for source in sources
+                  if source.primary],
+                 [(results[source.name], source.fields) for source in sources
+                  if not source.primary])
+
+
+def scrape_all(frontier=None, sources=None, workers=None):
+    """
+    Scrapes every source at the same time and merges the plants
+
+    Parameters:
+        frontier : URLFrontier or None
+            collects the plant care page urls, a new one is used if None
+        sources : list or None
+            Source objects, every registered source if None
+        workers : int or None
+            most sources scraped at the same time, all of them if None
+
+    Returns:
+        list : list of dictionaries containing all scraped data
+    """
+    if frontier is None:
+        frontier = URLFrontier()
+    return merge_results(run_sources(frontier, sources, workers), sources)
@@ -0,0 +1,356 @@
+"""
+SQLite backend for the houseplant care data
+
+An alternative to "plant_data.csv" for catalogs that are shared between
+several processes or are too big to comfortably hold in a Python list.
+
+Notes:
+    -the database is opened in WAL mode so a re-scrape can write a new
+    catalog while other processes keep reading the previous one
+
+    -every plant name (alias) is stored in its own indexed table so a lookup
+    is a single index probe instead of a scan over every Plant
+
+    -an FTS5 table over the aliases is used for partial name search
+
+    -light, water and soil descriptions are stored once in the care table,
+    plants only keep their ids
+
+    -each save increments PRAGMA user_version, readers compare it to
+    notice a new catalog (ex: to empty a cache)
+
+    -reads go through a small pool of read-only connections, sqlite3 keeps
+    a cache of prepared statements per connection so repeated lookups
+    don't get re-parsed
+"""
+
+import sqlite3 # database backend
+import queue # pool of read connections
+import time # how often the version is read
+from contextlib import contextmanager # borrowing a pooled connection
+
+
+# columns of the plants table and the keys of the rows returned by PlantStore,
+# they match the column names used in project.py after reading the csv file
+PLANT_COLUMNS = ['temp max',
+                'temp min',
+                'light ideal',
+                'light tolerated',
+                'water',
+                'soil']
+
+# columns that hold care table ids
+CARE_COLUMNS = ['light ideal', 'light tolerated', 'water', 'soil']
+
+# scraped dictionary keys (see scrape.py) for each plants table column
+SCRAPE_KEYS = {'temp max': 'temperature max. (c°)',
+            'temp min': 'temperature min. (c°)',
+            'light ideal': 'light ideal',
+            'light tolerated': 'light tolered',
+            'water': 'watering',
+            'soil': 'soil'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS care (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS plants (
+    id INTEGER PRIMARY KEY,
+    temp_max REAL,
+    temp_min REAL,
+    light_ideal INTEGER REFERENCES care(id),
+    light_tolerated INTEGER REFERENCES care(id),
+    water INTEGER REFERENCES care(id),
+    soil INTEGER REFERENCES care(id)
+);
+CREATE VIEW IF NOT EXISTS plants_text AS
+    SELECT plants.id, temp_max, temp_min,
+        light_ideal.value AS light_ideal,
+        light_tolerated.value AS light_tolerated,
+        water.value AS water,
+        soil.value AS soil
+    FROM plants
+    LEFT JOIN care AS light_ideal ON light_ideal.id = plants.light_ideal
+    LEFT JOIN care AS light_tolerated
+        ON light_tolerated.id = plants.light_tolerated
+    LEFT JOIN care AS water ON water.id = plants.water
+    LEFT JOIN care AS soil ON soil.id = plants.soil;
+CREATE TABLE IF NOT EXISTS aliases (
+    plant_id INTEGER NOT NULL REFERENCES plants(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    alias TEXT NOT NULL,
+    PRIMARY KEY (plant_id, position)
+);
+CREATE INDEX IF NOT EXISTS aliases_alias ON aliases(alias, plant_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS aliases_fts USING fts5(
+    alias,
+    plant_id UNINDEXED
+);
+"""
+
+
+def is_database(filename):
+    """
+    Checks if filename should be handled by the SQLite backend
+
+    Parameters:
+        filename : str
+            name of the data file
+
+    Returns:
+        bool : True for .db, .sqlite and .sqlite3 files
+    """
+    return str(filename).lower().endswith((".db", ".sqlite", ".sqlite3"))
+
+
+def connect(path):
+    """
+    Opens a writable connection to the database and creates the
+    tables if they don't exist yet
+
+    Parameters:
+        path : str
+            database file name
+
+    Returns:
+        sqlite3.Connection : connection in WAL mode
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL only needs to sync at checkpoints to stay consistent
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def save_plants(path, data_dict):
+    """
+    Replaces the catalog in the database with the scraped plants
+
+    All the writes happen in one transaction, readers see either the old
+    catalog or the new one, never a mix of both
+
+    Parameters:
+        path : str
+            database file name
+        data_dict : iterable
+            plant dictionaries (same as save_file)
+    """
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM aliases_fts")
+            conn.execute("DELETE FROM aliases")
+            conn.execute("DELETE FROM plants")
+            conn.execute("DELETE FROM care")
+            # new catalog generation, see PlantStore.version
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            care_ids = {}
+            for plant_id, plant in enumerate(data_dict, start=1):
+                values = []
+                for col in PLANT_COLUMNS:
+                    val = plant.get(SCRAPE_KEYS[col])
+                    if col in CARE_COLUMNS and val is not None:
+                        if val not in care_ids:
+                            care_ids[val] = len(care_ids) + 1
+                            conn.execute("INSERT INTO care VALUES (?, ?)",
+                                         (care_ids[val], val))
+                        val = care_ids[val]
+                    values.append(val)
+                conn.execute(
+                    "INSERT INTO plants VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [plant_id] + values)
+                names = [name.lower() for name in plant['name']]
+                conn.executemany(
+                    "INSERT INTO aliases VALUES (?, ?, ?)",
+                    [(plant_id, i, name) for i, name in enumerate(names)])
+                conn.executemany(
+                    "INSERT INTO aliases_fts (alias, plant_id) VALUES (?, ?)",
+                    [(name, plant_id) for name in names])
+    finally:
+        conn.close()
+
+
+class PlantStore:
+    """
+    Read access to a plant database
+
+    Iterating over a PlantStore gives one plant per row in the same order
+    they were saved, so it can be used anywhere the list of Plants from
+    gather_info() is used
+
+    Attributes
+    ----------
+        path : str
+            database file name
+        factory : callable
+            turns a row dictionary (PLANT_COLUMNS and 'name') into a plant,
+            by default the row dictionary is returned as it is
+        by_name : PlantStore
+            name lookups, by_name.get(name) returns the plant or None
+        version : int
+            catalog generation, changes every time the catalog is saved
+            (also by other processes)
+        check_interval : float
+            seconds version is remembered before the database is asked
+            again, so reading it often (ex: every LookupCache.lookup())
+            is cheap
+    """
+
+    def __init__(self, path, factory=None, pool_size=4, check_interval=1.0):
+        """ Constructor for PlantStore class """
+        self.path = path
+        self.factory = factory if factory is not None else (lambda row: row)
+        self.by_name = self
+        self.check_interval = check_interval
+        self._version = None
+        self._checked = None
+        self._pool = queue.Queue()
+        # make sure the tables exist before opening read-only connections
+        connect(path).close()
+        for _ in range(pool_size):
+            self._pool.put(self._open_reader())
+
+    def _open_reader(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """ Borrows a read connection from the pool """
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        """ Closes all the pooled read connections """
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    @property
+    def version(self):
+        now = time.monotonic()
+        if self._checked is None or now - self._checked >= self.check_interval:
+            with self.reader() as conn:
+                self._version = conn.execute(
+                    "PRAGMA user_version").fetchone()[0]
+            self._checked = now
+        return self._version
+
+    def _make(self, row, names):
+        plant_row = {col: row[col.replace(" ", "_")] for col in PLANT_COLUMNS}
+        # missing temperatures are NaN, same as when read_csv reads them
+        for col in ['temp max', 'temp min']:
+            if plant_row[col] is None:
+                plant_row[col] = float("nan")
+        plant_row['name'] = names
+        return self.factory(plant_row)
+
+    def _fetch(self, conn, row):
+        names = [r[0] for r in conn.execute(
+            "SELECT alias FROM aliases WHERE plant_id = ? ORDER BY position",
+            (row['id'],))]
+        return self._make(row, names)
+
+    def get(self, name, default=None):
+        """
+        Finds the plant that has name as one of its names
+
+        Parameters:
+            name : str
+                lowercase plant name
+            default :
+                returned if there is no plant with that name
+
+        Returns:
+            plant or default
+        """
+        with self.reader() as conn:
+            row = conn.execute(
+                "SELECT plants_text.* FROM aliases JOIN plants_text "
+                "ON plants_text.id = aliases.plant_id "
+                "WHERE aliases.alias = ? ORDER BY plants_text.id LIMIT 1",
+                (name,)).fetchone()
+            if row is None:
+                return default
+            return self._fetch(conn, row)
+
+    def search(self, text, limit=10):
+        """
+        Full text search over all the plant names
+
+        Parameters:
+            text : str
+                words to search for, the last word can be a prefix
+                (ex: "snake pl" finds "snake plant")
+            limit : int
+                maximum number of results
+
+        Returns:
+            list : matching plants, best matches first
+        """
+        words = [w.replace('"', '') for w in text.lower().split()]
+        if not words:
+            return []
+        query = " ".join(f'"{w}"' for w in words) + "*"
+        with self.reader() as conn:
+            ids = [r[0] for r in conn.execute(
+                "SELECT plant_id FROM aliases_fts WHERE aliases_fts MATCH ? "
+                "ORDER BY rank", (query,))]
+            # several names of the same plant can match
+            ids = list(dict.fromkeys(ids))[:limit]
+            rows = [conn.execute("SELECT * FROM plants_text WHERE id = ?",
+                                 (plant_id,)).fetchone() for plant_id in ids]
+            return [self._fetch(conn, row) for row in rows]
+
+    def _aliases(self, conn):
+        plants = {}
+        for plant_id, alias in conn.execute(
+                "SELECT plant_id, alias FROM aliases "
+                "ORDER BY plant_id, position"):
+            plants.setdefault(plant_id, []).append(alias)
+        return plants
+
+    def names(self):
+        """
+        Returns:
+            list : list of name lists, one per plant
+        """
+        with self.reader() as conn:
+            return list(self._aliases(conn).values())
+
+    def __iter__(self):
+        """
+        Yields the plants one at a time, the aliases and plants are read
+        with two cursors in plant id order so the catalog is never held
+        in memory (the iteration has its own connection, so iterators that
+        aren't used up don't take connections from the pool)
+        """
+        conn = self._open_reader()
+        try:
+            # one read transaction so both cursors see the same catalog
+            conn.execute("BEGIN")
+            aliases = conn.execute(
+                "SELECT plant_id, alias FROM aliases "
+                "ORDER BY plant_id, position")
+            alias = aliases.fetchone()
+            for row in conn.execute("SELECT * FROM plants_text ORDER BY id"):
+                names = []
+                while alias is not None and alias[0] <= row['id']:
+                    if alias[0] == row['id']:
+                        names.append(alias[1])
+                    alias = aliases.fetchone()
+                yield self._make(row, names)
+        finally:
+            conn.close()
+
+    def __len__(self):
+        with self.reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM plants").fetchone()[0]
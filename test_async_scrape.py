@@ -0,0 +1,249 @@
+"""
+Tests functions in async_scrape.py
+
+The websites are replaced by FakeSession so these tests don't need
+an internet connection
+"""
+
+import pytest
+import re
+import asyncio
+import threading
+import json
+import aiohttp
+from bs4 import BeautifulSoup
+import sources
+from async_scrape import (
+    async_scrape_html,
+    async_scrape_listing,
+    scrape_pages,
+    async_get_data)
+from scrape import URL_411, URL_TROP
+from sources import URLFrontier, Source, SOURCES, register
+
+
+TROP_PAGE = ("<p class='ar12D'><b>Latin Name :</b></p><p class='ar12D'>{}</p>"
+            "<p class='ar12D'><b>Other names :</b></p>"
+            "<p class='ar12D'><b>Common name :</b></p><p class='ar12D'>{}</p>"
+            "<p class='ar12D'><b>Categories :</b></p><p class='ar12D'>Other</p>"
+            "<p class='ar12D'><b>Temperature max. (C°) :</b></p><p class='ar12D'>30</p>"
+            "<p class='ar12D'><b>Temperature min. (C°) :</b></p><p class='ar12D'>12</p>"
+            "<p class='ar12D'><b>Light ideal :</b></p><p class='ar12D'>Full sun</p>"
+            "<p class='ar12D'><b>Light tolered :</b></p>"
+            "<p class='ar12D'><b>Watering :</b></p><p class='ar12D'>Water only when dry</p>"
+            "<p class='ar12D'><b>Family :</b></p><p class='ar12D'>Araceae</p>")
+PAGE_411 = ("<h1>{}</h1><div class='post-meta-key'>Soil</div>"
+            "<div class='post-meta-value'>Best soil for a plant: {}</div>")
+
+
+class FakeResponse:
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+        self.status = 200 if url in session.pages else 404
+
+    async def __aenter__(self):
+        self.session.active += 1
+        self.session.most_active = max(self.session.most_active,
+                                       self.session.active)
+        await asyncio.sleep(self.session.delay)
+        self.session.active -= 1
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def read(self):
+        return self.session.pages[self.url].encode()
+
+
+class FakeSession:
+    """ Stands in for aiohttp.ClientSession, pages maps url to html """
+    def __init__(self, pages, delay=0):
+        self.pages = pages
+        self.delay = delay
+        self.active = 0
+        self.most_active = 0
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(url)
+        return FakeResponse(self, url)
+
+
+class ThirdSource(Source):
+    """ A website added with register(), has a listing page """
+    name = "third"
+    url_pattern = re.compile(r"^https://third\.com/plant/\w+$")
+    listing = "https://third.com/plants"
+
+    def discover(self, frontier, fetch=None):
+        for link in fetch(self.listing).find_all('a'):
+            frontier.add(link.get('href'), self.listing)
+        frontier.mark_complete(self.name)
+        return frontier.urls(self.name)
+
+    def parse(self, soup):
+        return {'name': soup.find("h1").text.split(","),
+                'light tolered': soup.find("p").text}
+
+
+class ChainSource(Source):
+    """ Each listing page links to the next one """
+    name = "chain"
+    url_pattern = re.compile(r"^https://chain\.com/plant/\w+$")
+
+    def discover(self, frontier, fetch=None):
+        url = "https://chain.com/list/0"
+        while url is not None:
+            link = fetch(url).find('a')
+            url = None if link is None else link.get('href')
+        return []
+
+    def parse(self, soup):
+        return {'name': [soup.find("h1").text]}
+
+
+def fake_websites():
+    trop = "http://www.tropicopia.com/house-plant/"
+    pages = {trop + f"detail.np/detail-{i+1:02}.html":
+            TROP_PAGE.format(f"latin {i}", f"common {i}") for i in range(355)}
+    # plant pages are split over two listing pages
+    pages[URL_TROP] = ("<a href='list-2.html'>next</a><a href='#top'></a>" +
+                    "".join(f"<a href='detail.np/detail-{i+1:02}.html'></a>"
+                            for i in range(200)))
+    pages[trop + "list-2.html"] = ("<a href='index.html'>back</a>" +
+                    "".join(f"<a href='detail.np/detail-{i+1:02}.html'></a>"
+                            for i in range(150, 355)))
+    pages[URL_411] = ("<a href='/houseplant/jade'></a><a href='/houseplant/pothos/'></a>"
+                    "<a href='/houseplant/jade#soil'></a><a>no link</a>"
+                    "<a href='/contact-us'></a>")
+    pages["https://www.houseplant411.com/houseplant/jade"] = (
+                    PAGE_411.format("Latin 3", "sandy"))
+    pages["https://www.houseplant411.com/houseplant/pothos"] = (
+                    PAGE_411.format("Pothos", "loose"))
+    return pages
+
+def test_async_scrape_html():
+    session = FakeSession({"url": "<h1>hi</h1>"})
+    soup = asyncio.run(async_scrape_html(session, "url"))
+    assert isinstance(soup, BeautifulSoup)
+    assert soup.find("h1").text == "hi"
+
+def test_async_scrape_listing():
+    """ Error pages give None instead of raising """
+    session = FakeSession({"url": "<h1>hi</h1>"})
+    assert asyncio.run(async_scrape_listing(session, "url")).find("h1").text == "hi"
+    assert asyncio.run(async_scrape_listing(session, "missing")) is None
+
+def test_scrape_pages():
+    """ Pages are read concurrently, limited by the semaphore """
+    session = FakeSession({str(i): f"<h1>{i}</h1>" for i in range(20)},
+                        delay=0.01)
+    seen = []
+    threads = set()
+
+    def parse(soup):
+        threads.add(threading.current_thread())
+        return soup.find("h1").text
+
+    async def run():
+        return await scrape_pages(session, [str(i) for i in range(20)],
+                                parse, asyncio.Semaphore(5),
+                                progress=lambda *args: seen.append(args),
+                                source="test")
+
+    assert asyncio.run(run()) == [str(i) for i in range(20)]
+    assert session.most_active == 5
+    assert seen[-1] == ("test", 20, 20)
+    assert len(seen) == 20
+    # the pages are parsed in worker threads, not on the event loop
+    assert threading.main_thread() not in threads
+
+def test_scrape_pages_error():
+    """ A failed page cancels the others and raises the error """
+    session = FakeSession({"a": "<h1>a</h1>"}, delay=0.01)
+
+    async def run(urls):
+        return await scrape_pages(session, urls, lambda soup: soup.h1.text,
+                                asyncio.Semaphore(1))
+
+    # an error page isn't parsed
+    with pytest.raises(aiohttp.ClientError, match="status 404"):
+        asyncio.run(run(["a", "missing", "a"]))
+    with pytest.raises(AttributeError):
+        session.pages["b"] = "<p>no h1</p>"
+        asyncio.run(run(["a", "b", "a"]))
+
+def test_async_get_data(tmp_path):
+    filename = str(tmp_path / "plants.jsonl")
+    session = FakeSession(fake_websites())
+    frontier = URLFrontier(str(tmp_path / "urls.json"))
+    report = asyncio.run(async_get_data(filename, session=session,
+                                    frontier=frontier))
+    assert report['passed'] == 355
+    with open(filename, encoding="utf8") as file:
+        data = [json.loads(line) for line in file]
+    assert len(data) == 355
+    assert sorted(data[3]['name']) == ["common 3", "latin 3"]
+    assert data[3]['soil'] == "sandy"
+    assert data[4]['soil'] == "No information available"
+    assert data[3]['temperature max. (c°)'] == 30
+    assert (tmp_path / "plants.report.json").exists()
+    assert len(URLFrontier(str(tmp_path / "urls.json")).urls("tropicopia")) == 355
+
+def test_async_get_data_timeout(tmp_path):
+    session = FakeSession(fake_websites(), delay=1)
+
+    async def run():
+        await asyncio.wait_for(
+            async_get_data(str(tmp_path / "plants.csv"), session=session,
+                        frontier=URLFrontier(None)),
+            timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert not (tmp_path / "plants.csv").exists()
+
+def test_async_get_data_register(tmp_path, monkeypatch):
+    """ A registered website is scraped and merged without changes here """
+    # removed again after the test
+    monkeypatch.setitem(SOURCES, "third", None)
+    monkeypatch.setitem(sources.PLANT_URL_PATTERNS, "third", None)
+    register(ThirdSource())
+    pages = fake_websites()
+    pages[ThirdSource.listing] = "<a href='plant/five'></a><a href='/about'></a>"
+    pages["https://third.com/plant/five"] = "<h1>common 5,five</h1><p>Shade</p>"
+    filename = str(tmp_path / "plants.jsonl")
+    report = asyncio.run(async_get_data(filename, session=FakeSession(pages),
+                                    frontier=URLFrontier(None)))
+    assert report['passed'] == 355
+    with open(filename, encoding="utf8") as file:
+        data = [json.loads(line) for line in file]
+    # the plant keeps tropicopia's data and gets the third website's
+    assert sorted(data[5]['name']) == ["common 5", "five", "latin 5"]
+    assert data[5]['light tolered'] == "Shade"
+    assert data[5]['light ideal'] == "Full sun"
+    assert data[6]['light tolered'] is None
+
+def test_async_get_data_cancel_discover(tmp_path):
+    """ No listing page is requested after async_get_data() is cancelled """
+    pages = {f"https://chain.com/list/{i}": f"<a href='https://chain.com/list/{i+1}'></a>"
+            for i in range(10)}
+    session = FakeSession(pages, delay=0.05)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                async_get_data(str(tmp_path / "plants.csv"), session=session,
+                            frontier=URLFrontier(None), sources=[ChainSource()]),
+                timeout=0.12)
+        requested = len(session.requests)
+        # the discover thread is still running, the loop keeps going
+        await asyncio.sleep(0.5)
+        return requested
+
+    requested = asyncio.run(run())
+    assert 1 <= requested < 10
+    assert len(session.requests) == requested
+    assert not (tmp_path / "plants.csv").exists()
@@ -0,0 +1,101 @@
+""" Tests functions in export.py """
+
+import pytest
+import os
+import pandas as pd
+from project import Plant, gather_info, plant_info
+from export import plant_record, file_format, export, read_file
+
+
+RECORDS = [{'name':['jade plant','crassula ovata'],'soil':"sandy",
+            'temperature max. (c°)':'35','temperature min. (c°)':'10',
+            'light ideal':"Full sun",'light tolered':"Strong light",
+            'watering':"Water only when dry",'categories':"Cactus"},
+            {'name':['snake plant'],'soil':None,
+            'temperature max. (c°)':'30','temperature min. (c°)':None,
+            'light ideal':"Strong light",'light tolered':None,
+            'watering':"Can dry between watering",'categories':"Other"}]
+
+def test_plant_record():
+    p = Plant(["a","b"], soil="clay", temp=(10,5), light="sun", water="often")
+    assert plant_record(p) == {'name':['a','b'],'soil':"clay",
+                'temperature max. (c°)':10,'temperature min. (c°)':5,
+                'light ideal':"sun",'light tolered':None,'watering':"often"}
+    assert plant_record(RECORDS[0]) is RECORDS[0]
+
+def test_file_format():
+    assert file_format("plants.jsonl") == "jsonl"
+    assert file_format("plants.PARQUET") == "parquet"
+    assert file_format("plant_data.csv") == "csv"
+    with pytest.raises(ValueError):
+        read_file("plant_data.csv", ['name'])
+
+@pytest.mark.parametrize("extension", ["jsonl", "parquet", "csv"])
+def test_round_trip(tmp_path, extension):
+    """ Exported files are read back by gather_info() """
+    if extension == "parquet":
+        pytest.importorskip("pyarrow")
+    filename = str(tmp_path / f"plants.{extension}")
+    # a generator, records are streamed
+    assert export((r for r in RECORDS), filename) == 2
+    data = gather_info(filename)
+    assert [p.name for p in data] == [['jade plant','crassula ovata'],['snake plant']]
+    jade = plant_info(data, "crassula ovata")
+    assert jade.temp == (35, 10)
+    assert jade.light == ("Full sun","Strong light")
+    assert str(plant_info(data, "snake plant")) == str(
+                Plant(['snake plant'], temp=30, light="Strong light",
+                    water="Can dry between watering"))
+
+def test_export_plants(tmp_path):
+    """ Plant objects can be exported too """
+    filename = str(tmp_path / "plants.jsonl")
+    plants = gather_info()
+    export(plants, filename)
+    assert [str(p) for p in gather_info(filename)] == [str(p) for p in plants]
+
+def test_parquet_list_column(tmp_path):
+    pytest.importorskip("pyarrow")
+    filename = str(tmp_path / "plants.parquet")
+    export(RECORDS, filename, batch_size=1)
+    data = pd.read_parquet(filename)
+    assert list(data['name'][0]) == ['jade plant','crassula ovata']
+    assert pd.isna(data['soil'][1])
+
+def test_parquet_schema(tmp_path):
+    """ Column types don't depend on the first batch """
+    pytest.importorskip("pyarrow")
+    filename = str(tmp_path / "plants.parquet")
+    records = [{'name':['a'],'temperature min. (c°)':None},
+            {'name':['b'],'temperature min. (c°)':12.0,'soil':"sandy"}]
+    assert export(records, filename, batch_size=1) == 2
+    data = pd.read_parquet(filename)
+    assert data['temperature min. (c°)'].dtype == float
+    assert data['temperature min. (c°)'][1] == 12
+    assert data['soil'][1] == "sandy"
+
+def test_parquet_new_columns(tmp_path):
+    """ Columns that aren't known are added as text, even after a batch """
+    pytest.importorskip("pyarrow")
+    filename = str(tmp_path / "plants.parquet")
+    records = [{'name':['a'],'first new':"x"},{'name':['b'],'soil':"sandy"},
+            {'name':['c'],'later new':1,'temperature max. (c°)':"30"}]
+    assert export(records, filename, batch_size=1) == 3
+    data = pd.read_parquet(filename).astype(object).where(lambda d: d.notna(), None)
+    assert list(data['first new']) == ["x", None, None]
+    assert list(data['later new']) == [None, None, "1"]
+    assert list(data['soil']) == [None, "sandy", None]
+    assert data['temperature max. (c°)'][2] == 30
+    assert os.listdir(tmp_path) == ["plants.parquet"]
+
+def test_parquet_error(tmp_path):
+    """ An error while writing doesn't leave a half written file """
+    pytest.importorskip("pyarrow")
+    filename = str(tmp_path / "plants.parquet")
+    export([{'name':['old']}], filename)
+    records = ({'name':[str(i)],'temperature max. (c°)':"hot" if i == 5 else "30"}
+            for i in range(10))
+    with pytest.raises(ValueError):
+        export(records, filename, batch_size=2)
+    assert os.listdir(tmp_path) == ["plants.parquet"]
+    assert list(pd.read_parquet(filename)['name'][0]) == ['old']
@@ -0,0 +1,62 @@
+""" Tests functions and classes in merge.py """
+
+from merge import (
+    merge,
+    remove_repeats,
+    category_words,
+    SoilIndex,
+    soil_match_report)
+
+def test_merge():
+    """
+    Plants come from the primary lists, keys the first list is missing are
+    filled from the later ones, then supplements add their keys
+    """
+    primary = [[{'name':['ivy'],'soil':None},{'name':['ficus']}],
+                [{'name':['hedera','ivy'],'soil':"own"}]]
+    soil = [{'name':['ficus'],'soil':"rich"},{'name':['ivy'],'soil':"sandy"}]
+    light = [{'name':['ficus'],'light':"bright"}]
+    data = merge(primary, [(soil, {'soil':"none"}), (light, {'light':"none"})])
+    assert len(data) == 2
+    assert sorted(data[0]['name']) == ['hedera','ivy']
+    assert data[0]['soil'] == "own" and data[0]['light'] == "none"
+    assert data[1] == {'name':['ficus'],'soil':"rich",'light':"bright"}
+
+def test_soil_index():
+    """ Category words are matched whole, not as substrings """
+    small_list = [{'name':["ivy",""],'soil':"a"},{'name':['ficus','rubber tree'],'soil':"b"},
+                {'name':['cactus'],'soil':"c"}]
+    index = SoilIndex(small_list)
+    assert category_words("Cactus & Succulent") == ["cactus","succulent"]
+    assert index.max_words == 2
+    assert index.match({'name':['x'],'categories':"Ivyleaf plant"}) is None
+    assert index.match({'name':['x'],'categories':"Rubber Tree"}) == 1
+    assert index.match({'name':['cactus'],'categories':"Ficus"}) == 1
+    assert index.match({'name':['x'],'categories':None}) is None
+
+    big_list = [{'name':['x'],'categories':"Ivyleaf plant"},
+                {'name':['y'],'categories':"Cactus & Succulent"}]
+    assert soil_match_report(big_list, small_list) == (
+                [{'name':['x'],'categories':"Ivyleaf plant",'old':["ivy",""],'new':None},
+                {'name':['y'],'categories':"Cactus & Succulent",'old':["ivy",""],
+                'new':['cactus']}])
+
+def test_remove_repeats():
+    data_dict = ([{'name':['valid','valid plant2'],'other':1},
+                {'name':['plant3','valid'],'other':2},
+                {'name':['not valid'],'other':3}])
+    test = remove_repeats(data_dict)
+    result = ([{'name':['valid','valid plant2','plant3'],'other':1},
+                {'name':['not valid'],'other':3}])
+    assert test == result
+
+def test_remove_repeats_fill():
+    """ Keys the first plant is missing are filled from its repeats """
+    data_dict = [{'name':['ivy'],'soil':None,'light':"shade",'water':""},
+                 {'name':['hedera','ivy'],'soil':"own",'light':"sun"},
+                 {'name':['hedera'],'water':"weekly",'soil':"other"}]
+    data = remove_repeats(data_dict)
+    assert len(data) == 1
+    assert sorted(data[0]['name']) == ['hedera','ivy']
+    assert {key: data[0][key] for key in ['soil','light','water']} == (
+                {'soil':"own",'light':"shade",'water':"weekly"})
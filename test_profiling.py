@@ -0,0 +1,67 @@
+""" Tests functions in profiling.py """
+
+import pytest
+import pstats
+import tracemalloc
+from profiling import run, line_range, memory_totals, MemoryTracer
+
+
+def allocate():
+    return [str(i) * 10 for i in range(10000)]
+
+def temporary():
+    return len(allocate())
+
+def exits():
+    allocate()
+    raise SystemExit
+
+def test_line_range():
+    filename, first, last = line_range(allocate)
+    assert filename.endswith("test_profiling.py")
+    assert last == first + 1
+
+def test_profile(tmp_path, capsys):
+    """ The stats file is saved even if main() exits """
+    filename = str(tmp_path / "test.prof")
+    with pytest.raises(SystemExit):
+        run(exits, ["--profile", filename])
+    stats = pstats.Stats(filename)
+    assert any(func[2] == "allocate" for func in stats.stats)
+    assert filename in capsys.readouterr().err
+
+def test_trace_memory(capsys):
+    run(allocate, ["--trace-memory", "1"], trace=[allocate, exits])
+    report = capsys.readouterr().err
+    assert "allocate() 1 calls" in report
+    assert "exits() 0 calls, 0.0 KiB kept" in report
+    assert "| return [str(i) * 10" in report
+
+def test_memory_totals():
+    tracemalloc.start(10)
+    data = allocate()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    totals = memory_totals(snapshot.statistics("traceback"), [allocate])
+    _, first, _ = line_range(allocate)
+    size, count = totals["allocate"][first + 1]
+    assert size > 10000 * 10
+
+def test_memory_tracer():
+    """ Freed memory only shows up in the peak """
+    tracer = MemoryTracer([allocate, temporary])
+    tracemalloc.start(10)
+    tracer.install()
+    try:
+        # temporary() calls allocate() through the module global
+        assert temporary() == 10000
+        kept = globals()["allocate"]()
+    finally:
+        tracer.uninstall()
+        tracemalloc.stop()
+    assert globals()["allocate"] is allocate
+    assert tracer.calls == {"allocate": 2, "temporary": 1}
+    # the list temporary() made was freed before it returned
+    assert sum(size for size, _ in tracer.lines["temporary"].values()) < 10000
+    assert tracer.peaks["temporary"] > 10000 * 10
+    assert sum(size for size, _ in tracer.lines["allocate"].values()) > 10000 * 10
\ No newline at end of file
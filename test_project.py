@@ -1,13 +1,27 @@
 """ Tests functions/methods in project.py"""
 
 import pytest
+import io
+import shutil
+import pickle
 import pandas as pd
 from project import (
     Plant,
     format_data,
     ask_action,
     all_plants,
-    find_info)
+    find_info,
+    normalize_name,
+    LookupCache,
+    gather_info,
+    plant_info,
+    read_blocks,
+    match_temp_types,
+    load_block,
+    merge_block,
+    Catalog,
+    Vocabulary,
+    filter_plants)
 
 def test_plant():
     """ Tests all functionality of the Plant class """
@@ -38,6 +52,12 @@ def test_plant():
     assert p.format("temp","-Ideal Temperature (°C): ",p.temp) == "-Ideal Temperature (°C): 50"
     p.temp = (100,50)
     assert p.temp == (100,50)
+    p.temp = (30,float("nan"))
+    assert p.temp == (30,None)
+    assert p.format("temp","-Ideal Temperature (°C): ",p.temp) == "-Ideal Temperature (°C): 30"
+    p.temp = ("30","12")
+    assert p.temp is None
+    p.temp = (100,50)
     assert p.format("temp","-Ideal Temperature (°C): ",p.temp) == (
                 "-Ideal Temperature (°C): 50 to 100")
 
@@ -110,3 +130,122 @@ def test_find_info(monkeypatch):
                     "-Ideal Temperature (°C): 5 to 10\n-Light Requirements: high\n" +
                     "-Light Ideal: some\n-Water Frequency: often\n")
 
+
+def test_normalize_name():
+    assert normalize_name(" Snake  Plant ") == "snake plant"
+    assert normalize_name("jade plant") == "jade plant"
+
+def test_lookup_cache():
+    """ Tests cached lookups, negative caching and eviction """
+    p = Plant(name=["a","b"])
+    plant_list = [Plant("not"), p]
+    cache = LookupCache(maxsize=2)
+    assert cache.lookup(plant_list, " B") is p
+    assert cache.lookup(plant_list, "b") is p
+    assert cache.lookup(plant_list, "nope") is None
+    assert cache.lookup(plant_list, "nope") is None
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit rate": 0.5,
+                            "size": 2, "maxsize": 2}
+    # "b" was used least recently
+    cache.lookup(plant_list, "a")
+    assert cache.stats()["size"] == 2
+    cache.lookup(plant_list, "b")
+    assert cache.stats()["misses"] == 4
+
+    # new data empties the cache
+    other = Plant("b")
+    assert cache.lookup([other], "b") is other
+    assert cache.stats()["size"] == 1
+
+    # so does adding plants to the same catalog
+    catalog = Catalog([p])
+    assert cache.lookup(catalog, "c") is None
+    added = Plant("c")
+    catalog.merge([added])
+    assert cache.lookup(catalog, "c") is added
+
+def test_read_blocks():
+    """ Rows with quoted new lines stay in one block """
+    file = io.StringIO('a,"b\nc"\nd,e\nf,"g ""h"""\ni,j\n')
+    assert list(read_blocks(file, 2)) == ['a,"b\nc"\nd,e\n',
+                                        'f,"g ""h"""\ni,j\n']
+
+def test_catalog():
+    p1 = Plant(["a","b"])
+    p2 = Plant(["b","c"])
+    catalog = Catalog([p1])
+    catalog.merge([p2])
+    assert catalog == [p1, p2]
+    assert catalog.by_name == {"a": p1, "b": p1, "c": p2}
+    assert plant_info(catalog, "c") is p2
+    assert plant_info(catalog, "d") is None
+
+def test_gather_info_chunked(tmp_path):
+    """ Reading in blocks gives the same Plants as reading all at once """
+    filename = str(tmp_path / "plant_data.csv")
+    shutil.copy("plant_data.csv", filename)
+    plants = gather_info(filename)
+    chunked = gather_info(filename, chunksize=10, workers=2)
+    assert isinstance(chunked, Catalog)
+    assert [str(p) for p in chunked] == [str(p) for p in plants]
+    assert str(plant_info(chunked, "jade plant")) == (
+                str(plant_info(plants, "jade plant")))
+
+def test_match_temp_types():
+    """ A block without missing temperatures is shown like the others """
+    p1 = Plant("a", temp=(30, 12))
+    p2 = Plant("b", temp=(25, None))
+    match_temp_types([p1, p2])
+    assert str(p1.temp) == "(30, 12.0)"
+    assert str(p2.temp) == "(25, None)"
+    p3 = Plant("c")
+    match_temp_types([p1, p3])
+    assert str(p1.temp) == "(30.0, 12.0)"
+
+def test_load_block():
+    """ Blocks come back from workers as plain columns, not Plants """
+    header = "name,soil,temperature max. (c°),temperature min. (c°),light ideal,light tolered,watering\n"
+    block = ('"[\'Jade Plant\', \'crassula\']",sandy,35,10,Full sun,,often\n'
+            'Pothos,sandy,,,Full sun,,\n')
+    columns, index = load_block(header, block)
+    assert columns['name'] == [["jade plant","crassula"],["pothos"]]
+    assert columns['care'] == ["sandy","Full sun","often"]
+    assert columns['soil'] == [0,0]
+    assert columns['light tolerated'] == [-1,-1]
+    assert index == {"jade plant":0,"crassula":0,"pothos":1}
+
+    catalog = Catalog()
+    merge_block(catalog, (columns, index))
+    jade, pothos = catalog
+    assert (jade.name, jade.soil, jade.temp, jade.light, jade.water) == (
+                ["jade plant","crassula"],"sandy",(35,10),("Full sun",None),"often")
+    assert (pothos.temp, pothos.water) == (None, None)
+    assert catalog.by_name["crassula"] is jade
+
+def test_vocabulary():
+    vocab = Vocabulary()
+    assert vocab.encode("often") == 0
+    assert vocab.encode("rarely") == 1
+    assert vocab.encode("often") == 0
+    assert vocab.encode(float("nan")) is None
+    assert vocab.code("never") is None
+    assert vocab.decode(1) == "rarely"
+    assert vocab.decode(None) is None
+    assert len(vocab) == 2
+
+def test_care_encoding():
+    """ Plants with the same care information share the strings """
+    p1 = Plant("a", soil="clay " * 2, light=("sun", float("nan")), water="often")
+    p2 = Plant("b", soil="clay clay ", light=("sun", "shade"), water="rarely")
+    assert p1.soil is p2.soil
+    assert p1.light == ("sun", None)
+    assert filter_plants([p1, p2], "soil", "clay clay ") == [p1, p2]
+    assert filter_plants([p1, p2], "water", "rarely") == [p2]
+    assert filter_plants([p1, p2], "light ideal", "sun") == [p1, p2]
+    assert filter_plants([p1, p2], "light tolerated", "shade") == [p2]
+    assert filter_plants([p1, p2], "water", "unknown") == []
+    with pytest.raises(ValueError):
+        filter_plants([p1, p2], "temp", 5)
+
+    copy = pickle.loads(pickle.dumps(p2))
+    assert str(copy) == str(p2)
@@ -0,0 +1,63 @@
+""" Tests functions and classes in schedule.py """
+
+import io
+import pandas as pd
+import numpy as np
+from datetime import date
+from project import Plant
+from schedule import water_interval, light_level, care_rule, ScheduleEngine
+
+
+def make_engine():
+    return ScheduleEngine([
+        Plant(["jade plant","crassula ovata"], temp=(35,10),
+            light=("Full sun (+21,500 lux /+2000 fc )",float("nan")),
+            water="Must dry between watering  &  Water only when dry"),
+        Plant(["pothos"], temp=(30,15),
+            light=("Strong light ( 21,500 to 3,200 lux/2000 to 300 fc)",
+                "Diffuse light ( Less than 5,300 lux / 500 fc)"),
+            water="Keep moist between watering  &  Water when soil is half dry"),
+        Plant(["dry plant"])])
+
+def test_water_interval():
+    assert water_interval("Keep moist between watering  &  Water when soil is half dry") == 3
+    assert water_interval("Must dry between watering  & Water only when dry") == 14
+    assert water_interval("Something new") is None
+    assert water_interval(None) is None
+
+def test_light_level():
+    assert light_level("Full sun (+21,500 lux /+2000 fc )") == "full sun"
+    assert light_level("Diffuse light ( Less than 5,300 lux / 500 fc)") == "medium indirect"
+    assert light_level(None) is None
+
+def test_care_rule():
+    assert care_rule(make_engine().data[0]) == {"water every (days)": 14,
+                "light ideal": "full sun", "light min": "full sun",
+                "temp min": 10, "temp max": 35}
+
+def test_care_table():
+    engine = make_engine()
+    inventory = pd.DataFrame({"plant id": [7, 8, 9],
+                            "species": ["Crassula  Ovata", "pothos", "fern"]})
+    table = engine.care_table(inventory)
+    assert list(table["water every (days)"].fillna(0)) == [14, 3, 0]
+    assert list(table["light min"].fillna("")) == ["full sun", "medium indirect", ""]
+    assert engine.unknown_species(inventory) == ["fern"]
+
+def test_calendar():
+    """ Calendars are split into chunks and only have known plants """
+    engine = make_engine()
+    inventory = pd.DataFrame({"plant id": [1, 2, 3, 4],
+                            "species": ["jade plant", "pothos", "fern", "dry plant"]})
+    tables = list(engine.calendar(inventory, date(2024, 1, 1), days=7, chunksize=2))
+    assert len(tables) == 2
+    calendar = pd.concat(tables)
+    assert list(calendar["plant id"]) == [1, 2, 2, 2]
+    assert list(calendar["date"]) == list(np.array(
+                ["2024-01-01", "2024-01-01", "2024-01-04", "2024-01-07"],
+                dtype="datetime64[D]"))
+
+    file = io.StringIO()
+    assert engine.write_calendar(inventory, file, date(2024, 1, 1), 7, 2) == 4
+    assert file.getvalue().splitlines()[:2] == ["plant id,species,date,task",
+                                                "1,jade plant,2024-01-01,water"]
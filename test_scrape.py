@@ -6,15 +6,23 @@ test_get_data() takes a few minutes
 
 import pytest
 import os
+import json
 from bs4 import BeautifulSoup
 from scrape import(
     get_data,
     find_soil,
-    remove_repeats,
     read_411_page,
     clean_trop,
     read_trop_page,
-    scrape_html)
+    scrape_html,
+    normalize_url,
+    classify_url,
+    URLFrontier,
+    find_411_urls,
+    find_trop_urls,
+    trop_urls,
+    urls_411,
+    URL_TROP)
 
 def test_get_data():
     os.remove("plant_data.csv")
@@ -32,15 +40,6 @@ def test_find_soil():
     plant_dict = {'name':['no match'],'categories':'na'}
     assert find_soil(plant_dict,small_list) == {'name':['no match'],'categories':'na','soil':'No information available'}
 
-def test_remove_repeats():
-    data_dict = ([{'name':['valid','valid plant2'],'other':1},
-                {'name':['plant3','valid'],'other':2},
-                {'name':['not valid'],'other':3}])
-    test = remove_repeats(data_dict)
-    result = ([{'name':['valid','valid plant2','plant3'],'other':1},
-                {'name':['not valid'],'other':3}])
-    assert test == result
-
 def test_read_411_page():
     """ Tests if data from houseplant411 is read correctly using read_411_page()"""
     url = "https://www.houseplant411.com/houseplant/african-violet-how-to-grow-care-guide"
@@ -94,3 +93,85 @@ def test_trop():
 def test_scrape_html():
     url = "http://www.tropicopia.com/house-plant/detail.np/detail-01.html"
     assert isinstance(scrape_html(url), BeautifulSoup)
+
+def test_normalize_url():
+    base = "https://www.houseplant411.com/houseplant?popup=2"
+    assert normalize_url("/houseplant/jade/#care", base) == (
+                "https://www.houseplant411.com/houseplant/jade")
+    assert normalize_url("HTTPS://WWW.Houseplant411.com/x?a=1", base) == (
+                "https://www.houseplant411.com/x?a=1")
+    assert normalize_url(None, base) is None
+    assert normalize_url("mailto:me@example.com", base) is None
+
+def test_classify_url():
+    assert classify_url("https://www.houseplant411.com/houseplant/jade") == (
+                "houseplant411")
+    assert classify_url("http://www.tropicopia.com/house-plant/detail.np/"
+                        "detail-101.html") == "tropicopia"
+    assert classify_url("https://www.houseplant411.com/houseplant") is None
+    assert classify_url("https://www.houseplant411.com/contact") is None
+
+def test_url_frontier(tmp_path):
+    """ Tests finding, deduplicating and saving urls """
+    filename = str(tmp_path / "urls.json")
+    frontier = URLFrontier(filename)
+    base = "https://www.houseplant411.com/houseplant?popup=2"
+    soup = BeautifulSoup("<a href='/houseplant/a'></a><a href='/houseplant/a/'></a>"
+                        "<a></a><a href='/about'></a><a href='/houseplant/b'></a>",
+                        "html.parser")
+    assert find_411_urls(soup, frontier) == (
+                ["https://www.houseplant411.com/houseplant/a",
+                "https://www.houseplant411.com/houseplant/b"])
+    frontier.save()
+
+    # saved urls are used if nothing is found
+    frontier = URLFrontier(filename)
+    assert len(frontier.urls("houseplant411")) == 2
+    frontier.add("/houseplant/c", base)
+    frontier.add("/houseplant/a", base)
+    # b is kept until the whole list of plants is read again
+    assert frontier.urls("houseplant411") == (
+                ["https://www.houseplant411.com/houseplant/c",
+                "https://www.houseplant411.com/houseplant/a",
+                "https://www.houseplant411.com/houseplant/b"])
+    assert frontier.new_urls("houseplant411") == (
+                ["https://www.houseplant411.com/houseplant/c"])
+    frontier.mark_complete("houseplant411")
+    assert frontier.urls("houseplant411") == (
+                ["https://www.houseplant411.com/houseplant/c",
+                "https://www.houseplant411.com/houseplant/a"])
+
+def test_listing_errors(tmp_path):
+    """ Saved urls are used when listing pages can't be read """
+    filename = str(tmp_path / "urls.json")
+    saved = {"tropicopia": ["http://www.tropicopia.com/house-plant/detail.np/detail-01.html",
+                            "http://www.tropicopia.com/house-plant/detail.np/detail-09.html"],
+            "houseplant411": ["https://www.houseplant411.com/houseplant/a"]}
+    with open(filename, "w") as file:
+        json.dump(saved, file)
+    pages = {URL_TROP: "<a href='detail.np/detail-01.html'></a><a href='list-2.html'></a>"}
+    fetch = lambda url: (BeautifulSoup(pages[url], "html.parser")
+                        if url in pages else None)
+
+    frontier = URLFrontier(filename)
+    # list-2.html (with detail-09) can't be read
+    assert trop_urls(frontier, fetch=fetch) == saved["tropicopia"]
+    assert urls_411(frontier, fetch=fetch) == saved["houseplant411"]
+    frontier.save()
+    with open(filename) as file:
+        assert json.load(file) == saved
+
+    pages["http://www.tropicopia.com/house-plant/list-2.html"] = ""
+    frontier = URLFrontier(filename)
+    assert trop_urls(frontier, fetch=fetch) == saved["tropicopia"][:1]
+
+def test_find_trop_urls():
+    url = "http://www.tropicopia.com/house-plant/index.html"
+    soup = BeautifulSoup("<a href='detail.np/detail-02.html'></a>"
+                        "<a href='list-2.html'></a><a href='/other/page.html'></a>",
+                        "html.parser")
+    frontier = URLFrontier(None)
+    assert find_trop_urls(soup, url, frontier) == (
+                ["http://www.tropicopia.com/house-plant/list-2.html"])
+    assert frontier.urls("tropicopia") == (
+                ["http://www.tropicopia.com/house-plant/detail.np/detail-02.html"])
@@ -0,0 +1,143 @@
+""" Tests classes and functions in sources.py """
+
+import re
+import threading
+import pytest
+from bs4 import BeautifulSoup
+import sources
+from scrape import Tropicopia, Houseplant411
+from sources import (
+    URLFrontier,
+    Source,
+    SOURCES,
+    register,
+    run_sources,
+    merge_results,
+    scrape_all)
+
+
+class FakeSource(Source):
+    """ Reads plants from a dict of url -> html instead of a website """
+
+    def __init__(self, name, pages, primary=True, fields=None, barrier=None):
+        self.name = name
+        self.url_pattern = re.compile(rf"^https://{name}\.com/plant/\w+$")
+        self.pages = pages
+        self.primary = primary
+        self.fields = fields or {}
+        self.barrier = barrier
+
+    def discover(self, frontier, fetch=None):
+        if self.barrier is not None:
+            # only passes if the other source is running at the same time
+            self.barrier.wait()
+        for url in self.pages:
+            frontier.add(url, url)
+        return frontier.urls(self.name)
+
+    def parse(self, soup):
+        return {'names': soup.find("h1").text, 'soil': soup.find("p").text}
+
+    def to_schema(self, plant_dict):
+        return {'name': plant_dict.pop('names').split(","), **plant_dict}
+
+    def read(self, url):
+        return self.to_schema(self.parse(BeautifulSoup(self.pages[url],
+                                                       "html.parser")))
+
+
+def page(names, soil=""):
+    return f"<h1>{names}</h1><p>{soil}</p>"
+
+
+def test_builtin_sources():
+    assert list(SOURCES) == ["tropicopia", "houseplant411"]
+    assert SOURCES["tropicopia"].primary
+    assert not SOURCES["houseplant411"].primary
+    assert SOURCES["houseplant411"].fields == {'soil': "No information available"}
+    raw = {'latin name': "Ficus elastica", 'other names': None,
+           'common name': "Rubber plant, Rubber tree"}
+    assert Tropicopia().to_schema(raw) == (
+                {'name': ["ficus elastica", "rubber plant", "rubber tree"]})
+    soup = BeautifulSoup("<html></html>", "html.parser")
+    assert Houseplant411().to_schema({'name': ["a"]}) == {'name': ["a"]}
+    with pytest.raises(NotImplementedError):
+        Source().parse(soup)
+
+
+def test_read(monkeypatch):
+    """ read() downloads the page and maps it to the schema """
+    monkeypatch.setattr(sources, "scrape_html",
+                        lambda url: BeautifulSoup(page("a,b", "sandy"),
+                                                  "html.parser"))
+    source = FakeSource("fake", {})
+    assert Source.read(source, "https://fake.com/plant/a") == (
+                {'name': ["a", "b"], 'soil': "sandy"})
+
+
+def test_register(monkeypatch):
+    # removed again after the test
+    monkeypatch.setitem(SOURCES, "third", None)
+    monkeypatch.setitem(sources.PLANT_URL_PATTERNS, "third", None)
+    frontier = URLFrontier(None)
+    register(FakeSource("third", {}))
+    assert list(SOURCES) == ["tropicopia", "houseplant411", "third"]
+    assert frontier.add("https://third.com/plant/ivy", "") == "third"
+    assert frontier.urls("third") == ["https://third.com/plant/ivy"]
+
+
+def test_register_checks():
+    """ An incomplete website fails when it is registered """
+    class NoParse(Source):
+        name = "noparse"
+        url_pattern = re.compile("x")
+
+        def discover(self, frontier, fetch=None):
+            return []
+
+    class NoName(FakeSource):
+        pass
+
+    with pytest.raises(TypeError, match="parse"):
+        register(NoParse())
+    no_name = NoName("x", {})
+    no_name.name = None
+    with pytest.raises(TypeError, match="name"):
+        register(no_name)
+    with pytest.raises(TypeError):
+        register("mysite")
+    assert list(SOURCES) == ["tropicopia", "houseplant411"]
+
+def test_run_sources(monkeypatch):
+    """ Sources are scraped at the same time and merged N ways """
+    monkeypatch.setattr(sources, "PLANT_URL_PATTERNS", {})
+    barrier = threading.Barrier(3, timeout=5)
+    first = FakeSource("first", {"https://first.com/plant/a": page("ivy,hedera"),
+                                 "https://first.com/plant/b": page("ficus")},
+                       barrier=barrier)
+    second = FakeSource("second", {"https://second.com/plant/c": page("hedera,english ivy"),
+                                   "https://second.com/plant/d": page("pothos")},
+                        barrier=barrier)
+    soil = FakeSource("soil", {"https://soil.com/plant/e": page("ficus,rubber tree", "rich")},
+                      primary=False, fields={'soil': "unknown"}, barrier=barrier)
+    for source in [first, second, soil]:
+        sources.PLANT_URL_PATTERNS[source.name] = source.url_pattern
+
+    frontier = URLFrontier(None)
+    results = run_sources(frontier, [first, second, soil])
+    assert [len(results[name]) for name in ["first", "second", "soil"]] == [2, 2, 1]
+
+    data = merge_results(results, [first, second, soil])
+    assert len(data) == 3
+    assert sorted(data[0]['name']) == ["english ivy", "hedera", "ivy"]
+    assert data[0]['soil'] == "unknown"
+    assert sorted(data[1]['name']) == ["ficus", "rubber tree"]
+    assert data[1]['soil'] == "rich"
+    assert data[2]['name'] == ["pothos"]
+
+    for source in [first, second, soil]:
+        source.barrier = None
+    data = scrape_all(frontier, [first, soil], workers=1)
+    assert [sorted(d['name']) for d in data] == [["hedera", "ivy"],
+                                                 ["ficus", "rubber tree"]]
+    assert run_sources(frontier, []) == {}
@@ -0,0 +1,110 @@
+""" Tests functions and classes in store.py """
+
+import pytest
+import math
+from project import Plant, gather_info, plant_info, all_plants, LookupCache
+from scrape import save_file
+from store import is_database, save_plants, PlantStore
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    data_dict = [{'name':['jade plant','crassula ovata'],'soil':"sandy",
+                'temperature max. (c°)':'35','temperature min. (c°)':'10',
+                'light ideal':"Full sun",'light tolered':"Strong light",
+                'watering':"Water only when dry",'categories':"Cactus"},
+                {'name':['snake plant','sansevieria'],'soil':"loose",
+                'temperature max. (c°)':'30','temperature min. (c°)':None,
+                'light ideal':"Strong light",'light tolered':None,
+                'watering':"Can dry between watering",'categories':"Other"}]
+    path = str(tmp_path / "plants.db")
+    save_file(data_dict, path)
+    return path
+
+def test_is_database():
+    assert is_database("plants.db")
+    assert is_database("plants.SQLITE")
+    assert not is_database("plant_data.csv")
+
+def test_plant_store(db_file):
+    """ Tests reading rows back from the database """
+    plants = PlantStore(db_file)
+    assert len(plants) == 2
+    assert plants.names() == [['jade plant','crassula ovata'],
+                            ['snake plant','sansevieria']]
+    row = plants.get("sansevieria")
+    assert row['name'] == ['snake plant','sansevieria']
+    assert row['temp max'] == 30
+    assert math.isnan(row['temp min'])
+    assert row['light tolerated'] is None
+    assert plants.get("nope") is None
+    assert [p['name'][0] for p in plants.search("plant")] == (
+                ['jade plant','snake plant'])
+    assert [p['name'][0] for p in plants.search("cras")] == ['jade plant']
+    assert plants.search("") == []
+    with plants.reader() as conn:
+        # "Strong light" is only stored once
+        assert conn.execute("SELECT COUNT(*) FROM care").fetchone()[0] == 6
+    plants.close()
+
+def test_plant_store_iter(db_file):
+    """ Plants are read lazily without holding pooled connections """
+    plants = PlantStore(db_file, pool_size=2)
+    rows = iter(plants)
+    first = next(rows)
+    assert first['name'] == ['jade plant','crassula ovata']
+    # more unfinished iterators than pooled connections
+    others = [iter(plants) for _ in range(3)]
+    for other in others:
+        next(other)
+    assert plants._pool.qsize() == 2
+    assert len(plants) == 2
+    assert plants.get("sansevieria")['soil'] == "loose"
+    # a re-scrape while iterating doesn't change the plants being read
+    save_plants(db_file, [{'name':['pothos'],'soil':"any"}])
+    assert [row['name'] for row in rows] == [['snake plant','sansevieria']]
+    assert [row['name'] for row in plants] == [['pothos']]
+    for other in others:
+        other.close()
+    plants.close()
+
+def test_save_replaces(db_file):
+    """ Saving again replaces the old catalog """
+    plants = PlantStore(db_file)
+    save_plants(db_file, [{'name':['pothos'],'soil':"any"}])
+    assert plants.names() == [['pothos']]
+    assert plants.get("jade plant") is None
+    assert plants.search("jade") == []
+    plants.close()
+
+def test_lookup_cache_db(db_file):
+    """ A re-scrape into the database empties the lookup cache """
+    plants = PlantStore(db_file, check_interval=60)
+    cache = LookupCache()
+    version = plants.version
+    assert cache.lookup(plants, "pothos") is None
+    assert cache.lookup(plants, "jade plant")['soil'] == "sandy"
+    save_plants(db_file, [{'name':['pothos'],'soil':"any"}])
+    # the version is only read again after check_interval seconds
+    assert plants.version == version
+    assert cache.lookup(plants, "jade plant")['soil'] == "sandy"
+    plants.check_interval = 0
+    assert plants.version == version + 1
+    assert cache.lookup(plants, "pothos")['soil'] == "any"
+    assert cache.lookup(plants, "jade plant") is None
+    plants.close()
+
+def test_gather_info_db(db_file):
+    """ project.py can use the database instead of the csv file """
+    data = gather_info(db_file)
+    assert all_plants(data) == ["+ Jade Plant / Crassula Ovata",
+                                "+ Snake Plant / Sansevieria"]
+    plant = plant_info(data, "crassula ovata")
+    assert isinstance(plant, Plant)
+    assert plant.soil == "sandy"
+    assert plant.temp == (35, 10)
+    assert plant.light == ("Full sun","Strong light")
+    assert str(plant_info(data, "snake plant")).endswith(
+                "-Ideal Temperature (°C): 30.0\n-Light Requirements: Strong light\n" +
+                "-Water Frequency: Can dry between watering\n")
+    assert plant_info(data, "nope") is None
@@ -0,0 +1,87 @@
+""" Tests functions and classes in validate.py """
+
+import json
+import os
+from validate import (
+    SchemaRule,
+    TypeRule,
+    TemperatureRule,
+    AliasRule,
+    Validator,
+    validate,
+    report_files)
+
+
+def plant(names, high="30", low="12"):
+    return {'name': names, 'temperature max. (c°)': high,
+            'temperature min. (c°)': low, 'light ideal': "Full sun",
+            'light tolered': float("nan"), 'watering': "often", 'soil': ""}
+
+def test_schema_rule():
+    assert SchemaRule().check(plant(["a"])) == []
+    assert SchemaRule().check({'name': "a"}) != []
+    assert ("error", "name is not a list of names") in SchemaRule().check(plant([]))
+
+def test_type_rule():
+    """ Values are cleaned up or reported """
+    p = plant(["a"], low=None)
+    assert TypeRule().check(p) == []
+    assert p['temperature max. (c°)'] == 30.0
+    assert p['temperature min. (c°)'] is None
+    assert p['light tolered'] is None
+    assert p['soil'] is None
+    assert TypeRule().check(plant(["a"], high="hot")) == (
+                [("error", "temperature max. (c°) is not a number: 'hot'")])
+
+def test_temperature_rule():
+    rule = TemperatureRule()
+    assert rule.check(plant(["a"], 30, 12)) == []
+    assert rule.check(plant(["a"], None, 12)) == [("warning", "no maximum temperature")]
+    assert rule.check(plant(["a"], 10, 12)) == (
+                [("error", "minimum 12 is above maximum 10")])
+    assert rule.check(plant(["a"], 300, None)) == (
+                [("error", "unrealistic temperature 300")])
+
+def test_alias_rule():
+    rule = AliasRule()
+    first = plant(["a", "b"])
+    second = plant(["b", "c"])
+    assert rule.check(first) == []
+    assert rule.check(second) == [("warning", "'b' is used by another plant")]
+    assert second['name'] == ["c"]
+    assert rule.check(plant(["a"]))[-1][0] == "error"
+
+def test_validator():
+    validator = Validator(sample_size=1)
+    good = list(validator.run([plant(["a"]), plant(["b"], high="hot"),
+                            plant(["a", "c"])]))
+    assert [p['name'] for p in good] == [["a"], ["c"]]
+    report = validator.report()
+    assert report['checked'] == 3
+    assert report['quarantined'] == 1
+    assert report['flagged'] == 2
+    assert report['rules']['types'] == {"error": 1, "warning": 0}
+    assert report['rules']['aliases'] == {"error": 0, "warning": 1}
+    # only sample_size issues are kept
+    assert [issue['plant'] for issue in report['sample']] == [1]
+
+def test_validate(tmp_path):
+    """ Plants stream through, the report is written at the end """
+    report_file, quarantine_file = report_files(str(tmp_path / "plant_data.csv"))
+    assert report_file.endswith("plant_data.report.json")
+    validator = Validator()
+    good = validate(iter([plant(["a"]), plant(["b"], high=10, low=20),
+                        plant(["a", "c"])]),
+                    report_file, quarantine_file, validator)
+    assert next(good)['name'] == ["a"]
+    assert validator.checked == 1
+    assert not os.path.exists(report_file)
+    assert [p['name'] for p in good] == [["c"]]
+    with open(report_file) as file:
+        assert json.load(file)['quarantined'] == 1
+    with open(quarantine_file) as file:
+        quarantined, warned = [json.loads(line) for line in file]
+    assert quarantined['data']['name'] == ["b"]
+    assert quarantined['issues'] == [{'rule': "temperature", 'severity': "error",
+                                    'message': "minimum 20.0 is above maximum 10.0"}]
+    assert not warned['quarantined'] and 'data' not in warned
@@ -0,0 +1,139 @@
+""" Tests functions and classes in work_queue.py """
+
+import pytest
+import time
+import json
+import multiprocessing
+from work_queue import JobQueue, run_worker, coordinate
+
+
+def fake_trop(url):
+    number = url.split("-")[-1]
+    return {'name': [f"plant {number}"], 'categories': "Other",
+            'temperature max. (c°)': "30", 'temperature min. (c°)': "12",
+            'light ideal': "Full sun", 'light tolered': None,
+            'watering': "Water only when dry"}
+
+def fake_411(url):
+    return {'name': ["plant 2"], 'soil': "sandy"}
+
+FAKE_PARSERS = {"tropicopia": fake_trop, "houseplant411": fake_411}
+
+
+def test_claim_and_lease(tmp_path):
+    """ Tests claiming tasks and reclaiming them when the lease runs out """
+    queue = JobQueue(str(tmp_path / "queue.db"), lease=0.2)
+    assert queue.add("tropicopia", ["t-1", "t-2"]) == 2
+    assert queue.add("tropicopia", ["t-2"]) == 0
+
+    assert queue.claim("w1") == (1, "tropicopia", "t-1")
+    assert queue.claim("w2") == (2, "tropicopia", "t-2")
+    assert queue.claim("w3") is None
+    assert queue.counts() == {"pending": 0, "leased": 2, "done": 0, "failed": 0}
+
+    # w1 crashed: its lease runs out and w3 gets the task
+    time.sleep(0.3)
+    assert queue.claim("w3") == (1, "tropicopia", "t-1")
+    assert not queue.complete(1, "w1", {"late": True})
+    assert queue.complete(1, "w3", {"name": ["a"]})
+    assert queue.complete(2, "w2", {"name": ["b"]})
+    assert queue.finished()
+    assert queue.results("tropicopia") == [{"name": ["a"]}, {"name": ["b"]}]
+    queue.close()
+
+def test_fail(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    queue.add("houseplant411", ["bad"])
+    task_id = queue.claim("w")[0]
+    queue.fail(task_id, "w", "error")
+    assert queue.counts()["pending"] == 1
+    task_id = queue.claim("w")[0]
+    queue.fail(task_id, "w", "error")
+    assert queue.counts()["failed"] == 1
+    assert queue.finished()
+    queue.close()
+
+def test_lease_runs_out_repeatedly(tmp_path):
+    """ A page that hangs every worker fails after max_attempts leases """
+    queue = JobQueue(str(tmp_path / "queue.db"), lease=0.01, max_attempts=2)
+    queue.add("tropicopia", ["t-1"])
+    assert queue.claim("w1") is not None
+    time.sleep(0.05)
+    assert queue.claim("w2") is not None
+    time.sleep(0.05)
+    assert queue.claim("w3") is None
+    assert queue.counts()["failed"] == 1
+    assert queue.finished()
+    assert not queue.complete(1, "w2", {"name": ["late"]})
+    queue.close()
+
+def test_add_rollback(tmp_path):
+    """ A failed add() doesn't leave a transaction open """
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    with pytest.raises(Exception):
+        queue.add("tropicopia", ["t-1", object()])
+    assert queue.add("tropicopia", ["t-1"]) == 1
+    queue.close()
+
+def test_run_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    queue.add("tropicopia", ["t-1", "t-2"])
+    queue.add("houseplant411", ["h-1", "h-2"])
+    parsers = dict(FAKE_PARSERS, houseplant411=lambda url: 1 / 0)
+    assert run_worker(queue, "w", parsers) == 2
+    assert queue.counts()["failed"] == 2
+    queue.close()
+
+def worker_process(path):
+    queue = JobQueue(path)
+    run_worker(queue, parsers=FAKE_PARSERS)
+    queue.close()
+
+def test_coordinate(tmp_path):
+    """ Several worker processes share the tasks, then results are combined """
+    path = str(tmp_path / "queue.db")
+    queue = JobQueue(path)
+    queue.add("tropicopia", [f"t-{i}" for i in range(50)])
+    queue.add("houseplant411", ["h-1"])
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=worker_process, args=(path,))
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    filename = str(tmp_path / "plants.jsonl")
+    report = coordinate(queue, filename, poll=0, timeout=5)
+    assert report['passed'] == 50
+    with open(filename, encoding="utf8") as file:
+        data = [json.loads(line) for line in file]
+    assert len(data) == 50
+    assert data[2] == {'name': ["plant 2"], 'categories': "Other",
+                    'temperature max. (c°)': 30, 'temperature min. (c°)': 12,
+                    'light ideal': "Full sun", 'light tolered': None,
+                    'watering': "Water only when dry", 'soil': "sandy"}
+    queue.close()
+
+def test_coordinate_no_workers_left(tmp_path):
+    """ A worker that crashed on the last try doesn't block the coordinator """
+    queue = JobQueue(str(tmp_path / "queue.db"), lease=0.01, max_attempts=1)
+    queue.add("tropicopia", ["t-1", "t-2"])
+    # w1 crashes on t-1, no worker claims anything after that
+    assert queue.claim("w1")[2] == "t-1"
+    task_id, _, url = queue.claim("w2")
+    assert queue.complete(task_id, "w2", fake_trop(url))
+    time.sleep(0.05)
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 1, "failed": 1}
+    assert queue.finished()
+    report = coordinate(queue, str(tmp_path / "plants.jsonl"), poll=0, timeout=5)
+    assert report['passed'] == 1
+    queue.close()
+
+def test_coordinate_timeout(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    queue.add("tropicopia", ["t-1"])
+    with pytest.raises(TimeoutError):
+        coordinate(queue, str(tmp_path / "plants.csv"), poll=0, timeout=0)
+    queue.close()
@@ -0,0 +1,368 @@
+"""
+Data quality checks for the scraped plant data
+
+Runs between combine() and save_file(): every plant dictionary is checked
+by each rule once, as the plants stream through to the file. Plants with
+errors are quarantined (left out of the saved data), every plant with a
+problem is written to the quarantine file with its issues as soon as it is
+checked. The report (counts and a sample of the issues) is a JSON file so
+other tools can read it, it is written once every plant was checked.
+
+Rules:
+    SchemaRule: every column is there and the plant has a list of names
+    TypeRule: temperatures are numbers, care information is text
+    TemperatureRule: temperatures are realistic and min is below max
+    AliasRule: a name is only used by one plant (later duplicates are removed)
+
+Notes:
+    -each rule only keeps counters, except AliasRule which has to remember
+    every name it has seen, the report only keeps the first SAMPLE_SIZE
+    issues
+
+    -rules can fix values (ex: TypeRule turns "30" into 30.0) so plants
+    that pass are clean for project.py
+"""
+
+import json # report and quarantine files
+import math # checking for NaN
+import os # report file names
+
+
+ERROR = "error"
+WARNING = "warning"
+
+# keys every plant dictionary needs before it is saved
+REQUIRED_KEYS = ['name',
+                'temperature max. (c°)',
+                'temperature min. (c°)',
+                'light ideal',
+                'light tolered',
+                'watering',
+                'soil']
+TEMP_KEYS = ['temperature max. (c°)', 'temperature min. (c°)']
+TEXT_KEYS = ['light ideal', 'light tolered', 'watering', 'soil']
+# issues kept in the report, the quarantine file has all of them
+SAMPLE_SIZE = 20
+
+
+def is_missing(val):
+    """
+    Returns:
+        bool : True if val is None, NaN or an empty string
+    """
+    return (val is None or val == "" or
+            (isinstance(val, float) and math.isnan(val)))
+
+
+class Rule:
+    """
+    Base class for the rules, check() is called once for each plant
+
+    Attributes
+    ----------
+        name : str
+            name of the rule in the report
+        counts : dict
+            number of errors and warnings found
+    """
+    name = "rule"
+
+    def __init__(self):
+        """ Constructor for Rule class """
+        self.counts = {ERROR: 0, WARNING: 0}
+
+
+    def check(self, plant_dict):
+        """
+        Checks (and can fix) one plant
+
+        Parameters:
+            plant_dict : dict
+                plant dictionary
+
+        Returns:
+            list : (severity, message) tuples for each problem found
+        """
+        return []
+
+
+class SchemaRule(Rule):
+    name = "schema"
+
+    def check(self, plant_dict):
+        issues = [(ERROR, f"missing {key}") for key in REQUIRED_KEYS
+                  if key not in plant_dict]
+        names = plant_dict.get('name')
+        if (type(names) is not list or not names or
+            not all(type(name) is str and name for name in names)):
+            issues.append((ERROR, "name is not a list of names"))
+        return issues
+
+
+class TypeRule(Rule):
+    name = "types"
+
+    def check(self, plant_dict):
+        issues = []
+        for key in TEMP_KEYS:
+            val = plant_dict.get(key)
+            if is_missing(val):
+                plant_dict[key] = None
+                continue
+            try:
+                plant_dict[key] = float(val)
+            except (TypeError, ValueError):
+                issues.append((ERROR, f"{key} is not a number: {val!r}"))
+        for key in TEXT_KEYS:
+            val = plant_dict.get(key)
+            if is_missing(val):
+                plant_dict[key] = None
+            elif type(val) is not str:
+                issues.append((ERROR, f"{key} is not text: {val!r}"))
+        return issues
+
+
+class TemperatureRule(Rule):
+    """ Temperatures (°C) must be between low and high """
+    name = "temperature"
+
+    def __init__(self, low=-20, high=50):
+        """ Constructor for TemperatureRule class """
+        super().__init__()
+        self.low = low
+        self.high = high
+
+
+    def check(self, plant_dict):
+        # TypeRule already made the temperatures numbers or None
+        high = plant_dict.get('temperature max. (c°)')
+        low = plant_dict.get('temperature min. (c°)')
+        if high is None:
+            return [(WARNING, "no maximum temperature")]
+        issues = [(ERROR, f"unrealistic temperature {temp}")
+                  for temp in [high, low]
+                  if temp is not None and not self.low <= temp <= self.high]
+        if low is not None and low > high:
+            issues.append((ERROR, f"minimum {low} is above maximum {high}"))
+        return issues
+
+
+class AliasRule(Rule):
+    """ Removes names that an earlier plant already has """
+    name = "aliases"
+
+    def __init__(self):
+        """ Constructor for AliasRule class """
+        super().__init__()
+        self.seen = set()
+
+
+    def check(self, plant_dict):
+        names = plant_dict.get('name')
+        if type(names) is not list:
+            return []
+        issues = []
+        kept = []
+        for name in names:
+            if name in self.seen:
+                # plant_info() would always find the earlier plant
+                issues.append((WARNING, f"{name!r} is used by another plant"))
+            else:
+                kept.append(name)
+        if not kept:
+            issues.append((ERROR, "every name is used by other plants"))
+            return issues
+        plant_dict['name'] = kept
+        self.seen.update(kept)
+        return issues
+
+
+def default_rules():
+    """
+    Returns:
+        list : new instances of all the rules, in the order they run
+    """
+    return [SchemaRule(), TypeRule(), TemperatureRule(), AliasRule()]
+
+
+class Validator:
+    """
+    Runs the rules on a stream of plants
+
+    Attributes
+    ----------
+        rules : list
+            Rule objects
+        sample_size : int
+            most issues kept for the report
+        checked : int
+            number of plants checked
+        quarantined : int
+            number of plants with errors
+        flagged : int
+            number of plants with errors or warnings
+        sample : list
+            the first sample_size issues, a dict for each problem
+            (plant position, names, rule, severity and message)
+    """
+
+    def __init__(self, rules=None, sample_size=SAMPLE_SIZE):
+        """ Constructor for Validator class """
+        self.rules = rules if rules is not None else default_rules()
+        self.sample_size = sample_size
+        self.checked = 0
+        self.quarantined = 0
+        self.flagged = 0
+        self.sample = []
+
+
+    def check(self, plant_dict):
+        """
+        Runs the rules on one plant, later rules are skipped after an error
+
+        Parameters:
+            plant_dict : dict
+                plant dictionary
+
+        Returns:
+            list : a dict for each problem found
+        """
+        position = self.checked
+        self.checked += 1
+        found = []
+        for rule in self.rules:
+            issues = rule.check(plant_dict)
+            for severity, message in issues:
+                rule.counts[severity] += 1
+                found.append({'plant': position,
+                              'name': plant_dict.get('name'),
+                              'rule': rule.name,
+                              'severity': severity,
+                              'message': message})
+            # later rules expect the schema and types to be right
+            if any(severity == ERROR for severity, _ in issues):
+                break
+        if found:
+            self.flagged += 1
+            self.sample.extend(found[:self.sample_size - len(self.sample)])
+        return found
+
+
+    def run(self, plants, quarantine=None):
+        """
+        Parameters:
+            plants : iterable
+                plant dictionaries
+            quarantine : file object or None
+                every plant with a problem is written to it
+                (see quarantine_record()) as soon as it is checked
+
+        Returns:
+            generator : the plants without errors
+        """
+        for plant_dict in plants:
+            issues = self.check(plant_dict)
+            has_error = any(issue['severity'] == ERROR for issue in issues)
+            if has_error:
+                self.quarantined += 1
+            if issues and quarantine is not None:
+                quarantine.write(quarantine_record(plant_dict, issues,
+                                                   has_error) + "\n")
+            if not has_error:
+                yield plant_dict
+
+
+    def report(self):
+        """
+        Returns:
+            dict : number of plants checked, passed, quarantined and with
+            any problem, error/warning counts for each rule and a sample
+            of the issues
+        """
+        return {'checked': self.checked,
+                'passed': self.checked - self.quarantined,
+                'quarantined': self.quarantined,
+                'flagged': self.flagged,
+                'rules': {rule.name: dict(rule.counts) for rule in self.rules},
+                'sample': self.sample}
+
+
+def quarantine_record(plant_dict, issues, quarantined):
+    """
+    Parameters:
+        plant_dict : dict
+            plant dictionary
+        issues : list
+            issues from Validator.check()
+        quarantined : bool
+            True if the plant is left out of the saved data
+
+    Returns:
+        str : JSON line with the plant's position, names, issues and,
+        for quarantined plants, the plant dictionary
+    """
+    record = {'plant': issues[0]['plant'],
+              'name': plant_dict.get('name'),
+              'quarantined': quarantined,
+              'issues': [{key: issue[key] for key in
+                          ['rule', 'severity', 'message']}
+                         for issue in issues]}
+    if quarantined:
+        record['data'] = plant_dict
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+
+def report_files(filename):
+    """
+    Parameters:
+        filename : str
+            name of the file the data is saved in (ex: "plant_data.csv")
+
+    Returns:
+        tuple(str, str) : names of the report and quarantine files next to it
+        (ex: "plant_data.report.json", "plant_data.quarantine.jsonl")
+    """
+    stem = os.path.splitext(filename)[0]
+    return stem + ".report.json", stem + ".quarantine.jsonl"
+
+
+def validate(plants, report_file=None, quarantine_file=None, validator=None):
+    """
+    Validates the plants as they are saved, pass the result straight to
+    save_file() so the plants are never collected in a list
+
+    Parameters:
+        plants : iterable
+            plant dictionaries
+        report_file : str or None
+            where the JSON report is saved once every plant was checked,
+            not saved if None
+        quarantine_file : str or None
+            where the plants with problems are saved (JSON Lines),
+            not saved if None
+        validator : Validator or None
+            does the checks, a new one if None (pass one to read
+            its report() afterwards)
+
+    Returns:
+        generator : the plants without errors
+    """
+    if validator is None:
+        validator = Validator()
+    quarantine = None
+    if quarantine_file is not None:
+        quarantine = open(quarantine_file, 'w', encoding='utf8')
+    try:
+        yield from validator.run(plants, quarantine)
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+
+    report = validator.report()
+    if report_file is not None:
+        with open(report_file, 'w', encoding='utf8') as file:
+            json.dump(report, file, indent=1, ensure_ascii=False)
+    if report['quarantined']:
+        print(f"{report['quarantined']} plants quarantined" +
+              (f", see {quarantine_file}" if quarantine_file is not None
+               else ""))
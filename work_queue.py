@@ -0,0 +1,376 @@
+"""
+Shared work queue for scraping with several worker processes or machines
+
+Every plant care page is a task in a SQLite database. Any number of workers
+claim tasks, read the page with the website's Source (see sources.py) and save
+the result back in the database. Once every task is finished the
+coordinator combines the results and saves them with save_file(), the same
+as get_data() does.
+
+Example (each line can be run in a different terminal):
+    python work_queue.py queue.db enqueue
+    python work_queue.py queue.db worker
+    python work_queue.py queue.db coordinate
+
+Notes:
+    -a claimed task is leased to a worker for a limited time, if the worker
+    crashes the lease runs out and another worker claims the task again
+
+    -a task that keeps failing is given up on after max_attempts tries,
+    the coordinator leaves it out of the data
+
+    -SQLite works for workers on the same machine (or a reliable shared
+    drive), JobQueue is kept small so it can be swapped for a networked queue
+"""
+
+import sqlite3 # queue storage
+import json # to store results
+import time # lease timeouts
+import os # default worker name
+import socket # default worker name
+import argparse # command line arguments
+import validate # data quality checks before saving
+import sources # the websites
+from sources import URLFrontier
+from merge import remove_repeats # combines plants with the same name
+from scrape import save_file # also registers tropicopia and houseplant411
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status, lease_until);
+"""
+
+class JobQueue:
+    """
+    Queue of page scraping tasks stored in a SQLite database
+
+    Attributes
+    ----------
+        path : str
+            database file name
+        lease : int/float
+            seconds a worker has to finish a claimed task
+        max_attempts : int
+            tries before a task is marked as failed
+    """
+
+    def __init__(self, path, lease=300, max_attempts=3):
+        """ Constructor for JobQueue class """
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        # autocommit, transactions are started explicitly
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+
+    def close(self):
+        """ Closes the database connection """
+        self._conn.close()
+
+
+    def add(self, source, urls):
+        """
+        Adds a task for each url, urls that are already queued are skipped
+
+        Parameters:
+            source : str
+                website of the pages (a name in sources.SOURCES)
+            urls : list
+                webpage urls
+
+        Returns:
+            int : number of new tasks
+        """
+        before = self._conn.total_changes
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (source, url) VALUES (?, ?)",
+                [(source, url) for url in urls])
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return self._conn.total_changes - before
+
+
+    def _fail_expired(self, now):
+        # tasks whose lease ran out on their last try, nobody may be left
+        # to claim them so counts() runs this too
+        self._conn.execute(
+            "UPDATE tasks SET status = 'failed', worker = NULL, "
+            "lease_until = NULL, "
+            "error = COALESCE(error, 'lease ran out') "
+            "WHERE status = 'leased' AND lease_until < ? "
+            "AND attempts >= ?", (now, self.max_attempts))
+
+
+    def claim(self, worker):
+        """
+        Leases the next pending task (or a task whose lease ran out)
+
+        A task whose lease ran out after max_attempts tries (the page
+        crashes or hangs every worker) is marked as failed instead
+
+        Parameters:
+            worker : str
+                name of the worker claiming the task
+
+        Returns:
+            tuple(int, str, str) or None : task id, source and url,
+            None if there is nothing to claim right now
+        """
+        now = time.time()
+        # IMMEDIATE locks the database so two workers can't claim one task
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._fail_expired(now)
+            task = self._conn.execute(
+                "SELECT id, source, url FROM tasks "
+                "WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if task is not None:
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker = ?, "
+                    "lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + self.lease, task[0]))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return task
+
+
+    def complete(self, task_id, worker, result):
+        """
+        Saves the result of a task
+
+        Parameters:
+            task_id : int
+                id from claim()
+            worker : str
+                name of the worker that claimed the task
+            result : dict
+                plant dictionary read from the page
+
+        Returns:
+            bool : False if the lease ran out and the task was
+            claimed by another worker (the result is not saved)
+        """
+        cursor = self._conn.execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(result), task_id, worker))
+        return cursor.rowcount == 1
+
+
+    def fail(self, task_id, worker, error):
+        """
+        Gives the task back to the queue after an error, or marks it
+        as failed after max_attempts tries
+
+        Parameters:
+            task_id : int
+                id from claim()
+            worker : str
+                name of the worker that claimed the task
+            error : str
+                description of the error
+        """
+        self._conn.execute(
+            "UPDATE tasks SET error = ?, worker = NULL, lease_until = NULL, "
+            "status = CASE WHEN attempts >= ? THEN 'failed' "
+            "ELSE 'pending' END "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (error, self.max_attempts, task_id, worker))
+
+
+    def counts(self):
+        """
+        A task whose lease ran out after max_attempts tries is counted
+        (and marked) as failed, even if no worker is left to claim it
+
+        Returns:
+            dict : number of tasks for each status
+            ("pending", "leased", "done", "failed")
+        """
+        self._fail_expired(time.time())
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for status, n in self._conn.execute(
+                "SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+            counts[status] = n
+        return counts
+
+
+    def finished(self):
+        """
+        Returns:
+            bool : True if every task is done or failed
+        """
+        counts = self.counts()
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+
+    def results(self, source):
+        """
+        Parameters:
+            source : str
+                website of the pages
+
+        Returns:
+            list : plant dictionaries of the finished tasks,
+            in the order the tasks were added
+        """
+        return [json.loads(row[0]) for row in self._conn.execute(
+            "SELECT result FROM tasks WHERE source = ? AND status = 'done' "
+            "ORDER BY id", (source,))]
+
+
+def default_worker():
+    """
+    Returns:
+        str : worker name that is unique across processes and machines
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def enqueue(queue, frontier=None):
+    """
+    Finds the plant care pages of every website in sources.SOURCES
+    and adds them to the queue
+
+    Parameters:
+        queue : JobQueue
+        frontier : sources.URLFrontier or None
+            collects the plant care page urls, a new one is used if None
+
+    Returns:
+        int : number of new tasks
+    """
+    if frontier is None:
+        frontier = URLFrontier()
+    added = 0
+    for name, source in sources.SOURCES.items():
+        added += queue.add(name, source.discover(frontier))
+    frontier.save()
+    return added
+
+
+def run_worker(queue, worker=None, parsers=None, wait=False, poll=5):
+    """
+    Claims and scrapes tasks until there is nothing left to claim
+
+    Parameters:
+        queue : JobQueue
+        worker : str or None
+            name of the worker, default_worker() if None
+        parsers : dict or None
+            website -> function that reads a url into a plant dictionary,
+            Source.read() of every website in sources.SOURCES if None
+        wait : bool
+            if True, keep waiting for tasks leased by other workers
+            (they may time out) until every task is finished
+        poll : int/float
+            seconds between checks while waiting
+
+    Returns:
+        int : number of tasks this worker finished
+    """
+    if worker is None:
+        worker = default_worker()
+    if parsers is None:
+        parsers = {name: source.read for name, source in sources.SOURCES.items()}
+    finished = 0
+    while True:
+        task = queue.claim(worker)
+        if task is None:
+            if wait and not queue.finished():
+                time.sleep(poll)
+                continue
+            return finished
+
+        task_id, source, url = task
+        try:
+            result = parsers[source](url)
+        except Exception as error:
+            queue.fail(task_id, worker, repr(error))
+        else:
+            if queue.complete(task_id, worker, result):
+                finished += 1
+
+
+def coordinate(queue, filename="plant_data.csv", poll=5, timeout=None):
+    """
+    Waits for every task to finish, then combines the results and saves them
+
+    Parameters:
+        queue : JobQueue
+        filename : str
+            name of the file the data is saved in, see scrape.save_file()
+        poll : int/float
+            seconds between checks
+        timeout : int/float or None
+            seconds to wait before giving up, None waits forever
+
+    Returns:
+        dict : data quality report of the saved plants,
+        see validate.Validator.report()
+
+    Raises:
+        TimeoutError: the tasks didn't finish in time
+    """
+    start = time.time()
+    while not queue.finished():
+        if timeout is not None and time.time() - start > timeout:
+            raise TimeoutError(f"Tasks not finished: {queue.counts()}")
+        time.sleep(poll)
+
+    if queue.counts()["failed"]:
+        print(f"{queue.counts()['failed']} pages could not be read")
+    data_dict = sources.merge_results(
+        {name: remove_repeats(queue.results(name)) for name in sources.SOURCES})
+    validator = validate.Validator()
+    save_file(validate.validate(data_dict, *validate.report_files(filename),
+                                validator), filename)
+    print(f"Data is saved in {filename}")
+    return validator.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scrape plant data with several worker processes")
+    parser.add_argument("queue", help="queue database file")
+    parser.add_argument("role", choices=["enqueue", "worker", "coordinate"])
+    parser.add_argument("--lease", type=float, default=300,
+                        help="seconds a worker has to finish a page")
+    parser.add_argument("--file", default="plant_data.csv",
+                        help="where the coordinator saves the data")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue, lease=args.lease)
+    match args.role:
+        case "enqueue":
+            print(f"{enqueue(queue)} pages added to the queue")
+        case "worker":
+            print(f"{run_worker(queue, wait=True)} pages scraped")
+        case "coordinate":
+            coordinate(queue, args.file)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()